@@ -2,154 +2,195 @@
 """SharePoint authentication diagnostic script"""
 
 import os
+import re
 import sys
 import json
 import uuid
+import logging
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
 import requests
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config.settings import load_env
+from token_utils import acquire_app_token, decode_jwt
+
+# Parse .env once when the script is loaded
+load_env()
+
+logger = logging.getLogger("sp.diag")
+
+_REQUIRED_VARS = ("TENANT_ID", "CLIENT_ID", "CLIENT_SECRET", "SITE_URL")
+_SP_URL_RE = re.compile(r"^https://[^/]+\.sharepoint\.com/", re.I)
+
+
+class _GraphRetry(Retry):
+    """Retry policy for Graph calls that never replays a POST the server may have applied"""
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        # POST is left out of allowed_methods, so connection and read errors never replay it;
+        # 429/503 mean the request was rejected before processing, so only those are resent
+        if method == "POST":
+            return bool(self.total) and status_code in (429, 503)
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+# Transient throttling/server errors only - 401/403 are never retried
+GRAPH_RETRY = _GraphRetry(
+    total=3,
+    backoff_factor=1.0,
+    status_forcelist=[429, 500, 502, 503, 504],
+    allowed_methods=["GET", "DELETE"],
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+def iter_collection(session, response):
+    """Yield the items of a Graph collection response, following @odata.nextLink pages"""
+    while True:
+        page = response.json()
+        yield from page.get("value", [])
+        
+        next_link = page.get("@odata.nextLink")
+        if not next_link:
+            return
+        response = session.get(next_link)
+        response.raise_for_status()
 
 def run_auth_diagnostic():
     """Execute SharePoint authentication diagnostic"""
-    print("=== SharePoint Authentication Diagnostic ===")
+    logger.info("=== SharePoint Authentication Diagnostic ===")
     
     # Check for .env file
     if not os.path.exists(".env"):
-        print("❌ Error: .env file not found")
-        print("   Please copy .env.example and configure it")
+        logger.error("❌ Error: .env file not found")
+        logger.info("   Please copy .env.example and configure it")
         return False
     
-    # Load environment variables
-    load_dotenv()
-    
-    # Check required variables
-    required_vars = ["TENANT_ID", "CLIENT_ID", "CLIENT_SECRET", "SITE_URL"]
-    missing_vars = [var for var in required_vars if not os.getenv(var)]
+    # Read each required variable exactly once
+    env = os.environ
+    env_values = tuple(env.get(var) for var in _REQUIRED_VARS)
+    missing_vars = tuple(var for var, value in zip(_REQUIRED_VARS, env_values) if not value)
     
     if missing_vars:
-        print(f"❌ Error: The following environment variables are not set: {', '.join(missing_vars)}")
+        logger.error("❌ Error: The following environment variables are not set: %s", ', '.join(missing_vars))
         return False
     
-    print("✅ All required environment variables are set")
+    logger.info("✅ All required environment variables are set")
+    tenant_id, client_id, client_secret, site_url = env_values
     
     # Check SharePoint site URL format
-    site_url = os.getenv("SITE_URL")
-    if not site_url.startswith("https://") or ".sharepoint.com/" not in site_url.lower():
-        print(f"❌ Error: Invalid SharePoint site URL: {site_url}")
-        print("   URL must be in the format: https://your-tenant.sharepoint.com/sites/your-site")
+    if not _SP_URL_RE.match(site_url):
+        logger.error("❌ Error: Invalid SharePoint site URL: %s", site_url)
+        logger.info("   URL must be in the format: https://your-tenant.sharepoint.com/sites/your-site")
         return False
     
-    print(f"✅ SharePoint site URL format is valid: {site_url}")
+    logger.info("✅ SharePoint site URL format is valid: %s", site_url)
     
     # Test authentication
-    print("\n--- Testing Authentication and Requests ---")
+    logger.info("\n--- Testing Authentication and Requests ---")
     
     try:
-        import msal
-        
-        # Set up token cache
-        cache = msal.SerializableTokenCache()
-        
-        # Create MSAL client application
-        tenant_id = os.getenv("TENANT_ID")
-        client_id = os.getenv("CLIENT_ID")
-        client_secret = os.getenv("CLIENT_SECRET")
+        logger.info("Tenant ID: %s...%s", tenant_id[:5], tenant_id[-5:])
+        logger.info("Client ID: %s...%s", client_id[:5], client_id[-5:])
         
-        print(f"Tenant ID: {tenant_id[:5]}...{tenant_id[-5:]}")
-        print(f"Client ID: {client_id[:5]}...{client_id[-5:]}")
-        
-        authority = f"https://login.microsoftonline.com/{tenant_id}"
-        app = msal.ConfidentialClientApplication(
-            client_id,
-            authority=authority,
-            client_credential=client_secret,
-            token_cache=cache
-        )
-        
-        # Try client credential flow
-        print("Attempting client credential flow with Microsoft Entra ID...")
-        scope = ["https://graph.microsoft.com/.default"]
-        result = app.acquire_token_for_client(scopes=scope)
+        # Try the token cache first, then the client credential flow
+        logger.info("Requesting access token from Microsoft Entra ID...")
+        result, from_cache = acquire_app_token(tenant_id, client_id, client_secret)
+        if from_cache:
+            logger.info("Found a valid access token in the token cache")
         
         if "access_token" not in result:
             error_code = result.get("error", "unknown")
             error_description = result.get("error_description", "Unknown error")
-            print(f"❌ Error: Authentication failed: {error_code} - {error_description}")
+            logger.error("❌ Error: Authentication failed: %s - %s", error_code, error_description)
             
             # Detailed explanations for common errors
             if "AADSTS700016" in str(error_description):
-                print("   Application not found or is disabled for the tenant")
-                print("   Please check your application registration in Microsoft Entra ID")
+                logger.info("   Application not found or is disabled for the tenant")
+                logger.info("   Please check your application registration in Microsoft Entra ID")
             elif "AADSTS7000215" in str(error_description):
-                print("   Invalid client secret")
-                print("   Check if your client secret is correct and not expired")
+                logger.info("   Invalid client secret")
+                logger.info("   Check if your client secret is correct and not expired")
             elif "AADSTS650057" in str(error_description):
-                print("   Invalid client credentials")
-                print("   Check your client ID and client secret")
+                logger.info("   Invalid client credentials")
+                logger.info("   Check your client ID and client secret")
             elif "AADSTS70011" in str(error_description):
-                print("   Application was not found in the tenant")
-                print("   Make sure the application is registered in this tenant")
+                logger.info("   Application was not found in the tenant")
+                logger.info("   Make sure the application is registered in this tenant")
             
-            print(f"\nFull error response: \n{json.dumps(result, indent=2)}")
+            logger.info("\nFull error response: \n%s", json.dumps(result, indent=2))
             return False
             
-        print("✅ Successfully obtained access token")
+        logger.info("✅ Successfully obtained access token")
         
         # Try accessing SharePoint site
-        print("Attempting to access SharePoint site...")
+        logger.info("Attempting to access SharePoint site...")
         
         headers = {
             "Authorization": f"Bearer {result['access_token']}",
             "Content-Type": "application/json",
         }
         
+        # Reuse one pooled connection for every Graph request below, retrying throttled calls
+        session = requests.Session()
+        session.headers.update(headers)
+        session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=GRAPH_RETRY))
+        
         # Extract domain and site name from site URL
-        site_parts = site_url.replace("https://", "").split("/")
-        domain = site_parts[0]
-        site_name = site_parts[2] if len(site_parts) > 2 else "root"
+        parts = urlsplit(site_url)
+        domain = parts.netloc
+        path_parts = parts.path.strip("/").split("/")
+        site_name = path_parts[1] if len(path_parts) > 1 else "root"
         
-        print(f"Domain: {domain}, Site: {site_name}")
+        logger.info("Domain: %s, Site: %s", domain, site_name)
         
         graph_url = f"https://graph.microsoft.com/v1.0/sites/{domain}:/sites/{site_name}"
-        print(f"Request: {graph_url}")
+        logger.info("Request: %s", graph_url)
         
-        response = requests.get(graph_url, headers=headers)
+        # The libraries are addressable by site path too, so list them while the site is fetched;
+        # both are reads, and the write probe below still runs on its own afterwards
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            drives_future = executor.submit(session.get, f"{graph_url}:/drives")
+            response = session.get(graph_url)
+            drives_response = drives_future.result()
         
         if response.status_code != 200:
-            print(f"❌ Error: Failed to access SharePoint site: HTTP {response.status_code}")
-            print(f"Response: {response.text}")
+            logger.error("❌ Error: Failed to access SharePoint site: HTTP %s", response.status_code)
+            logger.info("Response: %s", response.text)
             
             if response.status_code == 404:
-                print("   Specified site not found")
-                print("   Please check that your site URL is correct")
+                logger.info("   Specified site not found")
+                logger.info("   Please check that your site URL is correct")
             elif response.status_code == 401:
-                print("   No access permission")
-                print("   Please check that your application has been granted appropriate permissions")
-                print("   Permissions such as Sites.Read.All, Files.Read.All are required")
+                logger.info("   No access permission")
+                logger.info("   Please check that your application has been granted appropriate permissions")
+                logger.info("   Permissions such as Sites.Read.All, Files.Read.All are required")
             
             return False
             
         site_info = response.json()
-        print("✅ Successfully accessed SharePoint site")
-        print(f"Site name: {site_info.get('displayName', 'Unknown')}")
-        print(f"Site ID: {site_info.get('id', 'Unknown')}")
+        logger.info("✅ Successfully accessed SharePoint site")
+        logger.info("Site name: %s", site_info.get('displayName', 'Unknown'))
+        logger.info("Site ID: %s", site_info.get('id', 'Unknown'))
         
         # Try listing document libraries
-        print("\nAttempting to list document libraries...")
+        logger.info("\nAttempting to list document libraries...")
         
-        drives_url = f"https://graph.microsoft.com/v1.0/sites/{site_info['id']}/drives"
-        response = requests.get(drives_url, headers=headers)
-        
-        if response.status_code != 200:
-            print(f"❌ Error: Failed to list document libraries: HTTP {response.status_code}")
-            print(f"Response: {response.text}")
+        if drives_response.status_code != 200:
+            logger.error("❌ Error: Failed to list document libraries: HTTP %s", drives_response.status_code)
+            logger.info("Response: %s", drives_response.text)
         else:
-            drives = response.json().get("value", [])
-            print(f"✅ Successfully listed {len(drives)} document libraries")
-            for drive in drives:
-                print(f"  - {drive.get('name', 'Unknown')}")
+            # Print libraries page by page instead of collecting the whole listing first
+            drive_count = 0
+            for drive in iter_collection(session, drives_response):
+                drive_count += 1
+                logger.info("  - %s", drive.get('name', 'Unknown'))
+            logger.info("✅ Successfully listed %s document libraries", drive_count)
         
         # Test write permissions
-        print("\n--- Testing Write Permissions ---")
+        logger.info("\n--- Testing Write Permissions ---")
         try:
             # Try to create a test list
             test_list_name = f"TestList_{uuid.uuid4().hex[:8]}"
@@ -163,53 +204,43 @@ def run_auth_diagnostic():
                 "description": "Test list created by diagnostic tool"
             }
             
-            print(f"Attempting to create test list: {test_list_name}")
-            create_response = requests.post(create_list_url, headers=headers, json=create_list_data)
+            logger.info("Attempting to create test list: %s", test_list_name)
+            create_response = session.post(create_list_url, json=create_list_data)
             
             if create_response.status_code in (201, 200):
-                print("✅ Successfully created a test list - write permissions confirmed")
+                logger.info("✅ Successfully created a test list - write permissions confirmed")
                 
                 # Clean up - delete test list
                 list_id = create_response.json().get("id")
                 delete_url = f"https://graph.microsoft.com/v1.0/sites/{site_info['id']}/lists/{list_id}"
-                delete_response = requests.delete(delete_url, headers=headers)
+                delete_response = session.delete(delete_url)
                 
                 if delete_response.status_code in (204, 200):
-                    print("✅ Test list deleted successfully")
+                    logger.info("✅ Test list deleted successfully")
                 else:
-                    print(f"⚠️ Warning: Could not delete test list: {delete_response.status_code}")
+                    logger.warning("⚠️ Warning: Could not delete test list: %s", delete_response.status_code)
             else:
-                print(f"❌ Failed to create test list: {create_response.status_code}")
-                print(f"Response: {create_response.text}")
-                print("   You may not have sufficient write permissions")
-                print("   Check that your application has Sites.ReadWrite.All permission")
-                print("   For creating sites, you also need Sites.Manage.All permission")
+                logger.error("❌ Failed to create test list: %s", create_response.status_code)
+                logger.info("Response: %s", create_response.text)
+                logger.info("   You may not have sufficient write permissions")
+                logger.info("   Check that your application has Sites.ReadWrite.All permission")
+                logger.info("   For creating sites, you also need Sites.Manage.All permission")
         except Exception as e:
-            print(f"❌ Error during write permission test: {str(e)}")
+            logger.error("❌ Error during write permission test: %s", e)
         
         # Check application permissions
-        print("\n--- Checking Application Permissions ---")
+        logger.info("\n--- Checking Application Permissions ---")
         try:
             # Decode token to check permissions
-            token = result['access_token']
-            token_parts = token.split('.')
-            if len(token_parts) >= 2:
-                # Add padding
-                payload = token_parts[1]
-                payload += '=' * ((4 - len(payload) % 4) % 4)
-                
-                # Decode
-                import base64
-                decoded = base64.b64decode(payload)
-                claims = json.loads(decoded)
-                
+            claims = decode_jwt(result['access_token'])
+            if claims:
                 # Check roles
                 roles = claims.get('roles', [])
                 
                 if roles:
-                    print("Found the following roles in token:")
+                    logger.info("Found the following roles in token:")
                     for role in roles:
-                        print(f"  - {role}")
+                        logger.info("  - %s", role)
                         
                     # Check for specific permissions
                     required_permissions = [
@@ -219,39 +250,43 @@ def run_auth_diagnostic():
                         "Sites.Manage.All"
                     ]
                     
-                    missing_permissions = [p for p in required_permissions if not any(p in r for r in roles)]
+                    # Role names are exact tokens, so match them with a set lookup
+                    role_set = set(roles)
+                    missing_permissions = [p for p in required_permissions if p not in role_set]
                     
                     if missing_permissions:
-                        print("\n⚠️ Warning: The following permissions are recommended but not found:")
+                        logger.warning("\n⚠️ Warning: The following permissions are recommended but not found:")
                         for p in missing_permissions:
-                            print(f"  - {p}")
-                        print("   Some operations may fail without these permissions")
+                            logger.info("  - %s", p)
+                        logger.info("   Some operations may fail without these permissions")
                     else:
-                        print("\n✅ All required permissions are present in the token")
+                        logger.info("\n✅ All required permissions are present in the token")
                 else:
-                    print("❌ No roles found in token - check application permissions in Microsoft Entra ID")
+                    logger.error("❌ No roles found in token - check application permissions in Microsoft Entra ID")
             else:
-                print("⚠️ Could not decode token to check permissions")
+                logger.warning("⚠️ Could not decode token to check permissions")
         except Exception as e:
-            print(f"⚠️ Error checking permissions: {str(e)}")
+            logger.warning("⚠️ Error checking permissions: %s", e)
         
     except Exception as e:
-        print(f"❌ Error: Exception during diagnostic: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error: Exception during diagnostic: %s", e)
         return False
     
-    print("\n✅ Authentication diagnostic completed successfully")
+    logger.info("\n✅ Authentication diagnostic completed successfully")
     return True
 
 if __name__ == "__main__":
+    # Plain progress output; messages are only formatted when INFO is enabled
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    
     try:
         result = run_auth_diagnostic()
         if not result:
-            print("\n❌ Authentication diagnostic failed")
+            logger.error("\n❌ Authentication diagnostic failed")
             sys.exit(1)
     except Exception as e:
-        print(f"❌ Error: An error occurred during diagnostic execution: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error: An error occurred during diagnostic execution: %s", e)
         sys.exit(1)
\ No newline at end of file
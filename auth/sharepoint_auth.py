@@ -1,18 +1,71 @@
 """SharePoint authentication handler module."""
 
-from dataclasses import dataclass
+import asyncio
+import atexit
+import base64
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-import json
+from functools import lru_cache
 import os
+import re
+import time
 import logging
+import threading
 
 import msal
+import orjson
 import requests
-from config.settings import SHAREPOINT_CONFIG, TOKEN_CACHE_FILE
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config.settings import (
+    RUN_STARTUP_DIAGNOSTICS,
+    SHAREPOINT_CONFIG,
+    SHAREPOINT_SITE_ENDPOINT,
+    TOKEN_CACHE_FILE,
+)
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+# Set up logging (handlers and levels are configured by the application)
 logger = logging.getLogger("sharepoint_auth")
+logger.addHandler(logging.NullHandler())
+
+# Refresh tokens this long before they expire so requests never see a stale token. Together with
+# TOKEN_EXPIRY_MARGIN this stays inside the 5 minutes before expiry in which MSAL stops serving a
+# cached token, so a refresh always gets a new one instead of the token it is replacing
+TOKEN_REFRESH_SKEW = timedelta(minutes=3)
+# Treat tokens as expired this many seconds early to absorb clock skew and request latency
+TOKEN_EXPIRY_MARGIN = 60
+
+_SP_URL_RE = re.compile(r"^https://[^/]+\.sharepoint\.com/", re.I)
+
+
+def _new_graph_session() -> requests.Session:
+    """Create a keep-alive session for Graph calls that retries transient failures."""
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retry))
+    return session
+
+
+# Process-wide Graph session, so refreshed contexts keep reusing the same warm connections
+_GRAPH_SESSION: requests.Session | None = None
+_GRAPH_SESSION_LOCK = threading.Lock()
+
+
+def _get_graph_session() -> requests.Session:
+    """Return the shared Graph session, creating it on first use."""
+    global _GRAPH_SESSION
+    if _GRAPH_SESSION is None:
+        with _GRAPH_SESSION_LOCK:
+            if _GRAPH_SESSION is None:
+                _GRAPH_SESSION = _new_graph_session()
+    return _GRAPH_SESSION
+
 
 @dataclass
 class SharePointContext:
@@ -20,47 +73,129 @@ class SharePointContext:
     access_token: str
     token_expiry: datetime
     graph_url: str = "https://graph.microsoft.com/v1.0"
+    # Pooled HTTP session shared by every Graph call and every context in the process
+    session: requests.Session = field(default_factory=_get_graph_session, repr=False, compare=False)
+    # JWT payload decoded once at acquisition time
+    claims: dict = field(default_factory=dict, repr=False, compare=False)
+    roles: frozenset[str] = frozenset()
+    # Graph ID of the configured site, resolved once by test_connection
+    site_id: str | None = None
+    # ID of the site's first document library, used by the write probe
+    drive_id: str | None = None
+    # Serializes refreshes so concurrent handlers don't all call MSAL
+    refresh_lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False, repr=False, compare=False)
+    # Pending background refresh started by refresh_token_if_needed, if any
+    refresh_task: asyncio.Task | None = field(default=None, init=False, repr=False, compare=False)
+    # Monotonic-clock deadline mirroring token_expiry, cheaper to check and immune to clock changes
+    expires_at_mono: float = field(default=0.0, init=False, repr=False, compare=False)
+    # Authorization headers, rebuilt only when the access token changes
+    _headers: dict[str, str] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _headers_token: str | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._update_deadline()
+        self._log_token_preview()
+
+    def _log_token_preview(self) -> None:
+        """Log a short preview of the token once, when it is adopted."""
+        # ヘッダーの内容をログに出力（トークンは一部のみ表示）
+        if self.access_token and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Using token (preview): %s...%s", self.access_token[:10], self.access_token[-10:])
+
+    def _update_deadline(self) -> None:
+        """Recompute the monotonic deadline from token_expiry."""
+        if self.token_expiry:
+            remaining = self.token_expiry.timestamp() - time.time()
+            self.expires_at_mono = time.monotonic() + remaining - TOKEN_EXPIRY_MARGIN
+        else:
+            self.expires_at_mono = 0.0
+
+    def update_token(self, other: "SharePointContext") -> None:
+        """Adopt the token (and its decoded claims) from a freshly acquired context."""
+        if other is self:
+            return
+        self.set_token(other.access_token, other.token_expiry, other.claims)
+        self.site_id = other.site_id or self.site_id
+        self.drive_id = other.drive_id or self.drive_id
+
+    def set_token(self, access_token: str, token_expiry: datetime, claims: dict) -> None:
+        """Swap in a newly acquired token and its decoded claims."""
+        self.access_token = access_token
+        self.token_expiry = token_expiry
+        self.claims = claims
+        self.roles = frozenset(claims.get("roles", ()))
+        self._update_deadline()
+        self._log_token_preview()
 
     @property
     def headers(self) -> dict[str, str]:
-        """Get authorization headers for API calls."""
-        # ヘッダーの内容をログに出力（トークンは一部のみ表示）
-        token_preview = f"{self.access_token[:10]}...{self.access_token[-10:]}" if self.access_token else "None"
-        logger.debug(f"Using token (preview): {token_preview}")
-        
-        return {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json",
-        }
+        """Get authorization headers for API calls (shared; copy before modifying)."""
+        if self._headers_token is not self.access_token:
+            self._headers = {
+                "Authorization": f"Bearer {self.access_token}",
+                "Content-Type": "application/json",
+            }
+            self._headers_token = self.access_token
+        return self._headers
 
     def is_token_valid(self) -> bool:
         """Check if the access token is still valid."""
         # Add safety check to handle None expiry
         if not self.token_expiry:
             return False
-        is_valid = datetime.now() < self.token_expiry
-        logger.debug(f"Token valid: {is_valid}, Expires: {self.token_expiry}")
+        is_valid = time.monotonic() < self.expires_at_mono
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Token valid: {is_valid}, Expires: {self.token_expiry}")
         return is_valid
 
+    def needs_refresh(self, skew: timedelta = TOKEN_REFRESH_SKEW) -> bool:
+        """Check if the access token expires within the refresh window."""
+        if not self.token_expiry:
+            return True
+        return time.monotonic() + skew.total_seconds() >= self.expires_at_mono
+
+    async def ensure_site_ids(self) -> None:
+        """Resolve and cache site_id and drive_id if they are not known yet."""
+        if self.site_id:
+            return
+        # The connection probe fetches both IDs in a single batch request
+        await asyncio.to_thread(self.test_connection)
+
     def test_connection(self) -> bool:
         """Test the connection to SharePoint."""
         try:
-            # Extract site domain and name from site URL
-            site_parts = SHAREPOINT_CONFIG["site_url"].replace("https://", "").split("/")
-            domain = site_parts[0]
-            site_name = site_parts[2] if len(site_parts) > 2 else "root"
-            
-            # Get site information via Microsoft Graph API
-            site_url = f"{self.graph_url}/sites/{domain}:/sites/{site_name}"
-            logger.debug(f"Testing connection to: {site_url}")
+            # Fetch the site and its document libraries in a single $batch round trip
+            site_path = SHAREPOINT_SITE_ENDPOINT
+            batch = {
+                "requests": [
+                    {"id": "site", "method": "GET", "url": site_path},
+                    {"id": "drives", "method": "GET", "url": f"{site_path}:/drives"},
+                ]
+            }
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Testing connection to: {self.graph_url}{site_path}")
             
-            response = requests.get(site_url, headers=self.headers)
+            response = self.session.post(f"{self.graph_url}/$batch", headers=self.headers, json=batch)
             
             if response.status_code != 200:
                 logger.error(f"Connection test failed: HTTP {response.status_code} - {response.text}")
                 return False
-                
-            logger.info(f"Connection test successful: {response.status_code}")
+            
+            responses = {r.get("id"): r for r in orjson.loads(response.content).get("responses", [])}
+            site = responses.get("site", {})
+            if site.get("status") != 200:
+                logger.error(f"Connection test failed: HTTP {site.get('status')} - {site.get('body')}")
+                return False
+            
+            # Remember the site and first library IDs so later calls can skip these lookups
+            self.site_id = site.get("body", {}).get("id")
+            drives = responses.get("drives", {})
+            if drives.get("status") == 200:
+                libraries = drives.get("body", {}).get("value", [])
+                if libraries:
+                    self.drive_id = libraries[0].get("id")
+            
+            logger.info(f"Connection test successful: {site['status']}")
             return True
         except Exception as e:
             logger.error(f"Error during connection test: {e}")
@@ -71,40 +206,19 @@ class SharePointContext:
         try:
             logger.debug("Testing write permissions...")
             
-            # Extract site domain and name from site URL
-            site_parts = SHAREPOINT_CONFIG["site_url"].replace("https://", "").split("/")
-            domain = site_parts[0]
-            site_name = site_parts[2] if len(site_parts) > 2 else "root"
-            
-            # First get site ID
-            site_url = f"{self.graph_url}/sites/{domain}:/sites/{site_name}"
-            response = requests.get(site_url, headers=self.headers)
-            
-            if response.status_code != 200:
-                logger.error(f"Failed to get site ID: {response.status_code} - {response.text}")
-                return False
-            
-            site_id = response.json().get("id")
+            # Resolve the site and library IDs together in one $batch round trip,
+            # unless the connection test already cached them
+            if not (self.site_id and self.drive_id):
+                self.test_connection()
+            site_id, drive_id = self.site_id, self.drive_id
             if not site_id:
                 logger.error("Site ID not found in response")
                 return False
-            
-            # Try to create a simple folder in a document library
-            # First, get document libraries
-            drives_url = f"{self.graph_url}/sites/{site_id}/drives"
-            response = requests.get(drives_url, headers=self.headers)
-            
-            if response.status_code != 200:
-                logger.error(f"Failed to get document libraries: {response.status_code} - {response.text}")
-                return False
-                
-            drives = response.json().get("value", [])
-            if not drives:
+            if not drive_id:
                 logger.error("No document libraries found")
                 return False
                 
             # Try to create a test folder in the first document library
-            drive_id = drives[0].get("id")
             folder_url = f"{self.graph_url}/sites/{site_id}/drives/{drive_id}/root/children"
             
             test_folder_name = f"test-folder-{datetime.now().strftime('%Y%m%d%H%M%S')}"
@@ -114,7 +228,7 @@ class SharePointContext:
                 "@microsoft.graph.conflictBehavior": "rename"
             }
             
-            response = requests.post(folder_url, headers=self.headers, json=folder_data)
+            response = self.session.post(folder_url, headers=self.headers, json=folder_data)
             
             if response.status_code not in (200, 201):
                 logger.error(f"Failed to create test folder: {response.status_code} - {response.text}")
@@ -125,10 +239,10 @@ class SharePointContext:
             logger.info(f"Write permission test successful: {response.status_code}")
             
             # Try to delete the test folder
-            folder_id = response.json().get("id")
+            folder_id = orjson.loads(response.content).get("id")
             delete_url = f"{self.graph_url}/sites/{site_id}/drives/{drive_id}/items/{folder_id}"
             
-            delete_response = requests.delete(delete_url, headers=self.headers)
+            delete_response = self.session.delete(delete_url, headers=self.headers)
             if delete_response.status_code not in (200, 204):
                 logger.warning(f"Could not delete test folder: {delete_response.status_code}")
             else:
@@ -141,23 +255,13 @@ class SharePointContext:
             return False
 
     def decode_and_log_token_permissions(self) -> None:
-        """Decode token and log the permissions it contains."""
+        """Log the permissions contained in the cached token claims."""
         try:
-            import base64
-            
-            # Split token into parts
-            token_parts = self.access_token.split('.')
-            if len(token_parts) < 2:
+            claims = self.claims
+            if not claims:
                 logger.error("Invalid token format")
                 return
             
-            # Decode the payload (second part)
-            payload = token_parts[1]
-            # Add padding if necessary
-            payload += '=' * ((4 - len(payload) % 4) % 4)
-            decoded = base64.b64decode(payload)
-            claims = json.loads(decoded)
-            
             # Log token information
             logger.info("Token information:")
             logger.info(f"Token expires: {claims.get('exp', 'unknown')}")
@@ -165,7 +269,7 @@ class SharePointContext:
             logger.info(f"Token issuer: {claims.get('iss', 'unknown')}")
             
             # Check for roles (app permissions) or scp (delegated permissions)
-            roles = claims.get('roles', [])
+            roles = sorted(self.roles)
             scp = claims.get('scp', '')
             
             if roles:
@@ -189,11 +293,30 @@ class SharePointContext:
                 logger.error("No roles or scp claims found in token - operations will likely fail")
                 
         except Exception as e:
-            logger.error(f"Error decoding token: {e}")
+            logger.error(f"Error logging token permissions: {e}")
 
 
+def decode_token_claims(access_token: str) -> dict:
+    """Decode the payload of a JWT access token without verifying it."""
+    try:
+        # Only the payload is needed: the header is never decoded, and slicing
+        # between the dots avoids copying the header and signature segments
+        start = access_token.find('.') + 1
+        if not start:
+            return {}
+        end = access_token.find('.', start)
+        
+        # Decode the payload (second part), adding padding if necessary
+        payload = access_token[start:end if end != -1 else None].encode()
+        return orjson.loads(base64.urlsafe_b64decode(payload + b"=" * (-len(payload) % 4)))
+    except Exception as e:
+        logger.error(f"Error decoding token: {e}")
+        return {}
+
+
+@lru_cache(maxsize=1)
 def validate_config() -> None:
-    """Validate SharePoint configuration."""
+    """Validate SharePoint configuration (once; failures are re-checked on the next call)."""
     missing_vars = []
     for key in ["tenant_id", "client_id", "client_secret", "site_url"]:
         if not SHAREPOINT_CONFIG.get(key):
@@ -206,52 +329,109 @@ def validate_config() -> None:
     
     # Validate site URL format
     site_url = SHAREPOINT_CONFIG["site_url"]
-    if not site_url.startswith("https://") or ".sharepoint.com/" not in site_url.lower():
+    if not _SP_URL_RE.match(site_url):
         logger.error(f"Invalid SharePoint site URL: {site_url}")
         raise ValueError(f"Invalid SharePoint site URL: {site_url}")
 
 
+def _token_cache_mtime() -> int | None:
+    """Return the cache file's modification time, or None if it does not exist."""
+    try:
+        return os.stat(TOKEN_CACHE_FILE).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _load_token_cache(cache: msal.SerializableTokenCache) -> None:
+    """Load the persisted token cache from disk, if present."""
+    global _TOKEN_CACHE_MTIME
+    mtime = _token_cache_mtime()
+    if mtime is None:
+        return
+    try:
+        with open(TOKEN_CACHE_FILE, 'r') as cache_file:
+            cache.deserialize(cache_file.read())
+        _TOKEN_CACHE_MTIME = mtime
+        logger.info("Loaded token cache from file")
+    except Exception as e:
+        logger.warning(f"Error loading token cache: {e}")
+
+
+def _save_token_cache(cache: msal.SerializableTokenCache) -> None:
+    """Persist the token cache to disk."""
+    global _TOKEN_CACHE_MTIME
+    try:
+        # Imported here: the utils package imports GraphClient, which imports this module
+        from utils.json_cache import atomic_write
+        
+        # Swap in a fully written file, so readers never see a partial cache
+        atomic_write(TOKEN_CACHE_FILE, cache.serialize())
+        _TOKEN_CACHE_MTIME = _token_cache_mtime()
+        logger.info("Token cache saved to file")
+    except Exception as e:
+        logger.warning(f"Error saving token cache: {e}")
+
+
+# Process-wide MSAL application and the token cache attached to it
+_APP: msal.ConfidentialClientApplication | None = None
+_APP_LOCK = threading.Lock()
+_TOKEN_CACHE = msal.SerializableTokenCache()
+# Modification time of the cache file when this process last read or wrote it
+_TOKEN_CACHE_MTIME: int | None = None
+# Whether the opt-in write-permission probe has already run in this process
+_DIAGNOSTICS_DONE = False
+# Process-wide context; later authentications only swap its token
+_CONTEXT: SharePointContext | None = None
+
+
+def _flush_token_cache() -> None:
+    """Write the in-memory token cache to disk if MSAL changed it (runs at exit)."""
+    with _APP_LOCK:
+        if _TOKEN_CACHE.has_state_changed:
+            _save_token_cache(_TOKEN_CACHE)
+            _TOKEN_CACHE.has_state_changed = False
+
+
+def _get_msal_app() -> msal.ConfidentialClientApplication:
+    """Return the shared MSAL client application, creating it on first use."""
+    global _APP
+    with _APP_LOCK:
+        if _APP is not None:
+            # The cache lives in memory; only re-read the file if another process rewrote it
+            if _token_cache_mtime() not in (None, _TOKEN_CACHE_MTIME):
+                _load_token_cache(_TOKEN_CACHE)
+        else:
+            # Load existing cache file if it exists, and write it back once at exit
+            _load_token_cache(_TOKEN_CACHE)
+            atexit.register(_flush_token_cache)
+            
+            # Create MSAL client application
+            _APP = msal.ConfidentialClientApplication(
+                SHAREPOINT_CONFIG["client_id"],
+                authority=f"https://login.microsoftonline.com/{SHAREPOINT_CONFIG['tenant_id']}",
+                client_credential=SHAREPOINT_CONFIG["client_secret"],
+                token_cache=_TOKEN_CACHE
+            )
+        return _APP
+
+
 async def get_auth_context() -> SharePointContext:
     """Get SharePoint authentication context."""
     # Validate configuration first
     validate_config()
     
-    # Set up token cache
-    cache = msal.SerializableTokenCache()
-    
-    # Load existing cache file if it exists
-    if os.path.exists(TOKEN_CACHE_FILE):
-        try:
-            with open(TOKEN_CACHE_FILE, 'r') as cache_file:
-                cache.deserialize(cache_file.read())
-            logger.info("Loaded token cache from file")
-            
-            # Check if cache has a valid token
-            accounts = cache.find(msal.TokenCache.CredentialType.REFRESH_TOKEN)
-            if accounts:
-                logger.info("Found refresh token in cache, attempting to use it")
-        except Exception as e:
-            logger.warning(f"Error loading token cache: {e}")
-    
-    # Create MSAL client application
-    app = msal.ConfidentialClientApplication(
-        SHAREPOINT_CONFIG["client_id"],
-        authority=f"https://login.microsoftonline.com/{SHAREPOINT_CONFIG['tenant_id']}",
-        client_credential=SHAREPOINT_CONFIG["client_secret"],
-        token_cache=cache
-    )
+    # Building the app loads the cache file and resolves the authority, so keep it off the loop
+    app = await asyncio.to_thread(_get_msal_app)
     
     # First try to get token silently from cache
-    result = None
-    accounts = app.get_accounts()
-    if accounts:
-        logger.info("Account found in cache, attempting silent token acquisition")
-        result = app.acquire_token_silent(SHAREPOINT_CONFIG["scope"], account=accounts[0])
-    
+    # (client-credential tokens are cached per app, without an account)
+    logger.info("Attempting silent token acquisition from cache")
+    result = await asyncio.to_thread(app.acquire_token_silent, SHAREPOINT_CONFIG["scope"], account=None)
+
     # If silent token acquisition fails, get new token
     if not result:
         logger.info("No token in cache or silent acquisition failed, acquiring new token")
-        result = app.acquire_token_for_client(scopes=SHAREPOINT_CONFIG["scope"])
+        result = await asyncio.to_thread(app.acquire_token_for_client, scopes=SHAREPOINT_CONFIG["scope"])
     
     # Raise error if token acquisition fails
     if "access_token" not in result:
@@ -272,26 +452,27 @@ async def get_auth_context() -> SharePointContext:
         
         raise Exception(f"Authentication failed: {error_code} - {error_description}")
     
-    # Log a preview of the token (for security, only partial token is shown)
-    token_preview = f"{result['access_token'][:10]}...{result['access_token'][-10:]}"
-    logger.info(f"Token acquired successfully: {token_preview}")
-    
-    # Save token cache
-    try:
-        with open(TOKEN_CACHE_FILE, 'w') as cache_file:
-            cache_file.write(cache.serialize())
-        logger.info("Token cache saved to file")
-    except Exception as e:
-        logger.warning(f"Error saving token cache: {e}")
+    # The context logs a preview of the token when it adopts it
+    logger.info("Token acquired successfully")
     
-    # Calculate token expiry (default is 1 hour)
-    expiry = datetime.now() + timedelta(seconds=result.get("expires_in", 3600))
+    # Prefer the token's own exp claim; fall back to expires_in (default is 1 hour)
+    claims = decode_token_claims(result["access_token"])
+    expiry = datetime.fromtimestamp(claims.get("exp") or time.time() + result.get("expires_in", 3600))
     logger.info(f"Authentication successful, token expires at {expiry}")
     
+    # Reuse the existing context: its session and cached site/drive IDs stay valid
+    global _CONTEXT
+    if _CONTEXT is not None:
+        _CONTEXT.set_token(result["access_token"], expiry, claims)
+        _CONTEXT.decode_and_log_token_permissions()
+        return _CONTEXT
+    
     # Return auth context
     context = SharePointContext(
         access_token=result["access_token"],
-        token_expiry=expiry
+        token_expiry=expiry,
+        claims=claims,
+        roles=frozenset(claims.get("roles", ())),
     )
     
     # Decode and log token permissions
@@ -299,31 +480,76 @@ async def get_auth_context() -> SharePointContext:
     
     # Test connection immediately
     logger.info("Testing connection with acquired token...")
-    if not context.test_connection():
+    if not await asyncio.to_thread(context.test_connection):
         logger.warning("Connection test failed, but continuing anyway...")
     
-    # Test write permissions
-    logger.info("Testing write permissions...")
-    if not context.test_write_permissions():
-        logger.warning("Write permission test failed. Some operations may not work.")
-    else:
-        logger.info("Write permission test successful. Token has write permissions.")
+    # Test write permissions once per process, and only when diagnostics are enabled
+    global _DIAGNOSTICS_DONE
+    if RUN_STARTUP_DIAGNOSTICS and not _DIAGNOSTICS_DONE:
+        _DIAGNOSTICS_DONE = True
+        logger.info("Testing write permissions...")
+        if not await asyncio.to_thread(context.test_write_permissions):
+            logger.warning("Write permission test failed. Some operations may not work.")
+        else:
+            logger.info("Write permission test successful. Token has write permissions.")
     
+    # A concurrent first call may have finished first; fold into its context
+    if _CONTEXT is not None:
+        _CONTEXT.update_token(context)
+        return _CONTEXT
+    _CONTEXT = context
     return context
 
 
-async def refresh_token_if_needed(context: SharePointContext) -> None:
-    """Refresh token if needed."""
-    if not context.is_token_valid():
-        logger.info("Token expired, refreshing...")
+async def _refresh_token(context: SharePointContext) -> None:
+    """Re-authenticate and swap the new token into the context."""
+    async with context.refresh_lock:
+        # Another handler may have refreshed while we waited for the lock
+        if not context.needs_refresh():
+            return
+        
+        logger.info("Token close to expiry, refreshing...")
         try:
             # Re-authenticate to get a new token
             new_context = await get_auth_context()
             
             # Update the context
-            context.access_token = new_context.access_token
-            context.token_expiry = new_context.token_expiry
+            context.update_token(new_context)
             logger.info("Token refreshed successfully")
         except Exception as e:
             logger.error(f"Error refreshing token: {e}")
-            raise
\ No newline at end of file
+            raise
+
+
+async def _refresh_token_in_background(context: SharePointContext) -> None:
+    """Refresh the token without surfacing errors to any caller."""
+    try:
+        await _refresh_token(context)
+    except Exception as e:
+        logger.warning(f"Background token refresh failed, will retry: {e}")
+
+
+async def refresh_token_if_needed(context: SharePointContext) -> None:
+    """Refresh token if it is about to expire."""
+    if not context.needs_refresh():
+        return
+    
+    if context.is_token_valid():
+        # Still usable: keep serving it and refresh in the background
+        if context.refresh_task is None or context.refresh_task.done():
+            context.refresh_task = asyncio.create_task(_refresh_token_in_background(context))
+        return
+    
+    # Expired: the caller has to wait for a new token
+    await _refresh_token(context)
+
+
+async def refresh_token_periodically(context: SharePointContext, skew: timedelta = TOKEN_REFRESH_SKEW) -> None:
+    """Keep the context's token warm by refreshing it ahead of expiry."""
+    while True:
+        # Wait until the refresh window opens (retry failed refreshes after a short pause)
+        delay = max(context.expires_at_mono - skew.total_seconds() - time.monotonic(), 30.0)
+        await asyncio.sleep(delay)
+        
+        if context.needs_refresh(skew):
+            await _refresh_token_in_background(context)
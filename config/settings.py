@@ -1,35 +1,67 @@
 """Configuration settings for the SharePoint MCP Server."""
 
 import os
+from functools import lru_cache
+from types import MappingProxyType
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
 
+
+@lru_cache(maxsize=1)
+def load_env() -> None:
+    """Load environment variables from the .env file (parsed only on the first call)."""
+    load_dotenv()
+
+
 # Load environment variables from .env file
-load_dotenv()
+load_env()
 
 # Basic settings
 APP_NAME = "SharePoint MCP"
 DEBUG = os.getenv("DEBUG", "False").lower() in ("true", "1", "t")
+# Run the write-permission probe (creates and deletes a test folder) on the first authentication
+RUN_STARTUP_DIAGNOSTICS = os.getenv("SP_DIAGNOSTICS", "0") == "1"
 
 # SharePoint connection settings
-SHAREPOINT_CONFIG = {
-    "tenant_id": os.getenv("TENANT_ID", ""),
-    "client_id": os.getenv("CLIENT_ID", ""),
-    "client_secret": os.getenv("CLIENT_SECRET", ""),
-    "site_url": os.getenv("SITE_URL", ""),
-    "username": os.getenv("USERNAME", ""),
-    "password": os.getenv("PASSWORD", ""),
-    # Optional: For fallback scenarios when dynamic discovery fails
-    "site_id": os.getenv("SITE_ID", ""),
-    "drive_id": os.getenv("DRIVE_ID", ""),
-    "scope": [
-        "https://graph.microsoft.com/.default",
-        # The application must have these permissions:
-        # - Sites.Read.All (for reading site content)
-        # - Sites.ReadWrite.All (for modifying site content)
-        # - Sites.Manage.All (for creating sites)
-        # - Files.ReadWrite.All (for document operations)
-    ],
-}
+@lru_cache(maxsize=1)
+def get_sharepoint_config() -> MappingProxyType:
+    """Build the read-only SharePoint connection settings from the environment (once per process)."""
+    load_env()
+    return MappingProxyType({
+        "tenant_id": os.getenv("TENANT_ID", ""),
+        "client_id": os.getenv("CLIENT_ID", ""),
+        "client_secret": os.getenv("CLIENT_SECRET", ""),
+        "site_url": os.getenv("SITE_URL", ""),
+        "username": os.getenv("USERNAME", ""),
+        "password": os.getenv("PASSWORD", ""),
+        # Optional: For fallback scenarios when dynamic discovery fails
+        "site_id": os.getenv("SITE_ID", ""),
+        "drive_id": os.getenv("DRIVE_ID", ""),
+        "scope": [
+            "https://graph.microsoft.com/.default",
+            # The application must have these permissions:
+            # - Sites.Read.All (for reading site content)
+            # - Sites.ReadWrite.All (for modifying site content)
+            # - Sites.Manage.All (for creating sites)
+            # - Files.ReadWrite.All (for document operations)
+        ],
+    })
+
+
+SHAREPOINT_CONFIG = get_sharepoint_config()
+
+
+def parse_site_url(site_url: str) -> tuple[str, str]:
+    """Split a SharePoint site URL into its domain and site name."""
+    parts = urlsplit(site_url)
+    path_parts = parts.path.strip("/").split("/")
+    site_name = path_parts[1] if len(path_parts) > 1 else "root"
+    return parts.netloc, site_name
+
+
+# Site coordinates parsed once from the configured URL; append SHAREPOINT_SITE_ENDPOINT to the Graph URL
+SHAREPOINT_DOMAIN, SHAREPOINT_SITE_NAME = parse_site_url(SHAREPOINT_CONFIG["site_url"])
+SHAREPOINT_SITE_ENDPOINT = f"/sites/{SHAREPOINT_DOMAIN}:/sites/{SHAREPOINT_SITE_NAME}"
 
 # Microsoft Graph API settings
 GRAPH_API_VERSION = "v1.0"
@@ -38,6 +70,22 @@ GRAPH_BASE_URL = f"https://graph.microsoft.com/{GRAPH_API_VERSION}"
 # Token settings
 TOKEN_CACHE_FILE = ".token_cache"
 
+# File search settings: resolved Excel file lookups are kept on disk briefly, since each
+# analysis runs in its own process
+FILE_SEARCH_CACHE_FILE = ".file_search_cache"
+FILE_SEARCH_CACHE_TTL = 300  # seconds
+FILE_SEARCH_CACHE_SIZE = 256  # entries
+
+# Folder listings from the Excel and PowerPoint folder walks, reused while each folder's cTag/eTag is unchanged
+FOLDER_LISTING_CACHE_FILE = ".folder_listing_cache"
+
+# Site, library and folder IDs that generated reports are uploaded to
+UPLOAD_TARGET_CACHE_FILE = ".upload_target_cache"
+UPLOAD_TARGET_CACHE_TTL = 3600  # seconds
+
+# Rendered recruiting presentation, rebuilt whenever powerpoint_report_generator.py changes
+REPORT_DECK_CACHE_FILE = ".recruiting_deck_cache.pptx"
+
 # Document processing settings
 DOCUMENT_PROCESSING = {
     "max_text_preview_length": 5000,  # Maximum characters for text preview
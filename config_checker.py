@@ -2,10 +2,17 @@
 """Utility script to check SharePoint MCP configuration."""
 
 import os
+import re
 import sys
 from pathlib import Path
 import json
-from dotenv import load_dotenv
+from urllib.parse import urlparse
+
+from config.settings import load_env
+
+_REQUIRED_VARS = ("TENANT_ID", "CLIENT_ID", "CLIENT_SECRET", "SITE_URL")
+_OPTIONAL_VARS = ("USERNAME", "PASSWORD", "DEBUG")
+_SP_URL_RE = re.compile(r"^https://[^/]+\.sharepoint\.com/", re.I)
 
 def check_config():
     """Check configuration and report any issues."""
@@ -22,26 +29,12 @@ def check_config():
         return False
     
     # Load environment variables
-    load_dotenv()
+    load_env()
+    # Snapshot every variable we report on once, so each check is a plain dict lookup
+    env = {var: os.environ.get(var, "") for var in _REQUIRED_VARS + _OPTIONAL_VARS}
     
     # Check required variables
-    required_vars = [
-        "TENANT_ID", 
-        "CLIENT_ID", 
-        "CLIENT_SECRET", 
-        "SITE_URL"
-    ]
-    
-    optional_vars = [
-        "USERNAME",
-        "PASSWORD",
-        "DEBUG"
-    ]
-    
-    missing_vars = []
-    for var in required_vars:
-        if not os.getenv(var):
-            missing_vars.append(var)
+    missing_vars = tuple(var for var in _REQUIRED_VARS if not env[var])
     
     if missing_vars:
         print(f"❌ ERROR: Missing required environment variables: {', '.join(missing_vars)}")
@@ -50,10 +43,7 @@ def check_config():
     print("✅ All required environment variables are set")
     
     # Check optional variables
-    missing_optional = []
-    for var in optional_vars:
-        if not os.getenv(var):
-            missing_optional.append(var)
+    missing_optional = tuple(var for var in _OPTIONAL_VARS if not env[var])
     
     if missing_optional:
         print(f"⚠️ WARNING: Missing optional environment variables: {', '.join(missing_optional)}")
@@ -61,8 +51,8 @@ def check_config():
             print("   Note: USERNAME and PASSWORD are needed for user-delegated authentication")
     
     # Check site URL format
-    site_url = os.getenv("SITE_URL")
-    if not site_url.startswith("https://") or ".sharepoint.com/" not in site_url.lower():
+    site_url = env["SITE_URL"]
+    if not _SP_URL_RE.match(site_url):
         print(f"❌ ERROR: Invalid SharePoint site URL: {site_url}")
         print("   URL should be in format: https://your-tenant.sharepoint.com/sites/your-site")
         return False
@@ -85,7 +75,6 @@ def check_config():
     
     # Check permissions in site URL
     try:
-        from urllib.parse import urlparse
         parsed_url = urlparse(site_url)
         domain = parsed_url.netloc
         path_parts = parsed_url.path.strip('/').split('/')
@@ -97,14 +86,17 @@ def check_config():
     
     # Final check
     print("\n--- Configuration Summary ---")
-    print(f"🔹 Tenant ID: {os.getenv('TENANT_ID')[:5]}...{os.getenv('TENANT_ID')[-5:]}")
-    print(f"🔹 Client ID: {os.getenv('CLIENT_ID')[:5]}...{os.getenv('CLIENT_ID')[-5:]}")
+    tenant_id = env["TENANT_ID"]
+    client_id = env["CLIENT_ID"]
+    print(f"🔹 Tenant ID: {tenant_id[:5]}...{tenant_id[-5:]}")
+    print(f"🔹 Client ID: {client_id[:5]}...{client_id[-5:]}")
     print(f"🔹 Client Secret: {'*' * 10}")
     print(f"🔹 Site URL: {site_url}")
-    print(f"🔹 Debug Mode: {os.getenv('DEBUG', 'False')}")
+    print(f"🔹 Debug Mode: {env['DEBUG'] or 'False'}")
     
-    if os.getenv('USERNAME'):
-        print(f"🔹 Username: {os.getenv('USERNAME')}")
+    username = env['USERNAME']
+    if username:
+        print(f"🔹 Username: {username}")
     
     print("\n✅ Configuration check completed")
     return True
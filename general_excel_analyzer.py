@@ -4,85 +4,201 @@ General Excel Analyzer for SharePoint Files
 Analyzes any Excel file on SharePoint with function call tracking
 """
 
+import asyncio
 import os
 import sys
+import time
+from contextlib import aclosing
 import pandas as pd
-import requests
-from io import BytesIO
-from datetime import datetime
+import logging
 import json
 import argparse
 
+# Upper bound on concurrent Graph requests, to stay clear of throttling
+MAX_CONCURRENT_REQUESTS = 16
+
+# Workbooks larger than this are aggregated row by row instead of being loaded into a DataFrame
+STREAMING_THRESHOLD_BYTES = 50 * 1024 * 1024
+# openpyxl's read-only mode only opens the Office Open XML formats, so .xls always goes through pandas
+STREAMING_EXTENSIONS = (".xlsx", ".xlsm")
+# Distinct values tracked per text column while streaming, before reporting "N+"
+STREAMING_MAX_UNIQUE = 1000
+
+# Header keywords of the columns each specialized analysis reads; other columns are not loaded
+ANALYSIS_COLUMN_KEYWORDS = {
+    "recruiting": ("application", "applicant", "recruiter", "hiring", "screen", "offer", "days", "open", "fill"),
+    "financial": ("cost", "fee", "budget", "revenue", "expense", "amount"),
+}
+
 # Add the project root to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from auth.sharepoint_auth import get_auth_context
+from config.settings import (
+    FILE_SEARCH_CACHE_FILE,
+    FILE_SEARCH_CACHE_SIZE,
+    FILE_SEARCH_CACHE_TTL,
+    FOLDER_LISTING_CACHE_FILE,
+    SHAREPOINT_SITE_ENDPOINT,
+)
+from utils.fuzzy_match import find_best_match, is_exact_name, make_matcher, prepare_pattern
+from utils.json_cache import load_json_cache, save_json_cache
+from utils.document_processor import EXCEL_ENGINE
+
+# Step log (handlers and levels are configured by the script that runs the analysis)
+logger = logging.getLogger("excel_analyzer")
+logger.addHandler(logging.NullHandler())
+
+def setup_step_logging():
+    """Write the step log to stdout alongside the report (the analyze tools capture stdout)"""
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("[%(asctime)s] %(message)s", "%H:%M:%S"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+def print_section(title):
+    """Print a section banner with a single write"""
+    print(f"\n{'=' * 60}\n{title}\n{'=' * 60}")
 
 def log_function_call(step, function_name, file_location, status="SUCCESS", error=None):
-    """Log each function call with its location and status"""
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    print(f"\n[{timestamp}] Step {step}: {function_name}")
-    print(f"File: {file_location}")
-    print(f"Status: {status}")
+    """Log each function call with its location and status, as one line"""
     if error:
-        print(f"Error: {error}")
-    print("-" * 60)
+        logger.info("Step %s: %s | %s | %s | Error: %s", step, function_name, file_location, status, error)
+    else:
+        logger.info("Step %s: %s | %s | %s", step, function_name, file_location, status)
+
+# Graph client shared by the search and download steps (it reuses the context's pooled session)
+_graph_client = None
+
+def _get_graph_client(context):
+    """Return the Graph client for this auth context, creating it only when the context changes"""
+    global _graph_client
+    if _graph_client is None or _graph_client.context is not context:
+        from utils.graph_client import GraphClient
+        _graph_client = GraphClient(context)
+    return _graph_client
+
+def _load_file_search_cache():
+    """Load the unexpired file search results, or an empty cache if there is none"""
+    now = time.time()
+    return {
+        key: entry for key, entry in load_json_cache(FILE_SEARCH_CACHE_FILE).items()
+        if entry.get("expires", 0) > now
+    }
+
+def _save_file_search_cache(entries):
+    """Persist the file search cache, keeping only the most recently stored entries"""
+    newest = sorted(entries.items(), key=lambda item: item[1]["expires"])[-FILE_SEARCH_CACHE_SIZE:]
+    save_json_cache(FILE_SEARCH_CACHE_FILE, dict(newest))
+
+def _file_search_cache_key(pattern_clean):
+    """Key cached search results by site and normalized pattern"""
+    return f"{SHAREPOINT_SITE_ENDPOINT}|{pattern_clean}"
+
+def _cache_file_search_result(cache_key, file_info):
+    """Remember a resolved file for FILE_SEARCH_CACHE_TTL seconds; a failed write only costs a re-search"""
+    entries = _load_file_search_cache()
+    entries[cache_key] = {"expires": time.time() + FILE_SEARCH_CACHE_TTL, "file": file_info}
+    try:
+        _save_file_search_cache(entries)
+    except OSError as e:
+        print(f"Could not save file search cache: {e}")
+
+async def find_excel_file(filename_pattern, context, refresh=False):
+    """Find Excel file on SharePoint by name pattern using dynamic discovery
 
-async def find_excel_file(filename_pattern, context):
-    """Find Excel file on SharePoint by name pattern using dynamic discovery"""
+    Results are cached per pattern for a few minutes; pass refresh=True to search again.
+    """
     print(f"Searching for Excel file matching: '{filename_pattern}'")
     
     try:
-        from utils.graph_client import GraphClient
-        from config.settings import SHAREPOINT_CONFIG
-        
-        # Create Graph client
-        graph_client = GraphClient(context)
-        
-        # Get site info dynamically
-        site_parts = SHAREPOINT_CONFIG["site_url"].replace("https://", "").split("/")
-        domain = site_parts[0]
-        site_name = site_parts[2] if len(site_parts) > 2 else "root"
-        site_info = await graph_client.get_site_info(domain, site_name)
+        from config.settings import SHAREPOINT_CONFIG, SHAREPOINT_DOMAIN, SHAREPOINT_SITE_NAME
+        
+        pattern_clean, pattern_terms, pattern_words = prepare_pattern(filename_pattern, _STOP_TERMS)
+        matcher = make_matcher(pattern_clean, pattern_terms)
+        cache_key = _file_search_cache_key(pattern_clean)
+        if not refresh:
+            cached = _load_file_search_cache().get(cache_key)
+            if cached:
+                print(f"Using cached search result: {cached['file']['filename']}")
+                return cached["file"]
+        
+        # Reuse the shared Graph client
+        graph_client = _get_graph_client(context)
+        
+        # Get site info and document libraries dynamically; neither depends on the other, so fetch both at once
+        site_info, libraries_response = await asyncio.gather(
+            graph_client.get_site_info(SHAREPOINT_DOMAIN, SHAREPOINT_SITE_NAME),
+            graph_client.list_document_libraries(SHAREPOINT_DOMAIN, SHAREPOINT_SITE_NAME),
+        )
         site_id = site_info["id"]
-        
-        # Get document libraries dynamically
-        libraries_response = await graph_client.list_document_libraries(domain, site_name)
         drives = libraries_response.get("value", [])
         
         print(f"Found {len(drives)} document libraries to search")
         
-        # Search for Excel files in all drives
+        # Search all drives concurrently; Graph searches each whole library (all folders) in one paged query
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        query = filename_pattern.strip().strip("'\"")
+        
+        async def search_drive(drive):
+            print(f"Searching in library: {drive['name']}")
+            async with semaphore:
+                return await graph_client.search_drive(
+                    site_id, drive["id"], query,
+                    select=["id", "name", "size", "lastModifiedDateTime", "file", "parentReference"]
+                )
+        
+        # Keep the Excel files that match the pattern, handling each drive as its search completes
         excel_files = []
-        for drive in drives:
-            drive_id = drive["id"]
-            drive_name = drive["name"]
-            print(f"Searching in library: {drive_name}")
+        pending = {asyncio.create_task(search_drive(drive)): drive for drive in drives}
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            found_exact = False
+            for task in done:
+                drive = pending.pop(task)
+                if task.exception():
+                    print(f"Error searching drive {drive['name']}: {str(task.exception())}")
+                    continue
+                found_exact |= _collect_excel_matches(site_id, drive["id"], task.result(), pattern_clean, matcher, excel_files)
             
-            try:
-                # Get root folder contents
-                items_response = await graph_client.list_document_contents(site_id, drive_id, "root")
-                items = items_response.get("value", [])
-                
-                # Search through folders and files
-                await _search_items_for_excel(graph_client, site_id, drive_id, items, filename_pattern, excel_files)
-                
-            except Exception as e:
-                print(f"Error searching drive {drive_name}: {str(e)}")
-                continue
+            # An exact file name is the best possible match, so the other drives need not finish
+            if found_exact and pending:
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                break
+        
+        # Graph search matches whole words, so abbreviations ("recr2023") and partial term matches
+        # never come back from it; walk the libraries' folders with the local matcher instead
+        all_excel = []
+        if not excel_files:
+            print("No search hits, walking the library folders")
+            # Folder listings from earlier walks, reused while their folders' cTags/eTags still match
+            listing_cache = load_json_cache(FOLDER_LISTING_CACHE_FILE)
+            cached_listings = dict(listing_cache)
+            await asyncio.gather(*(
+                _walk_drive_for_excel(graph_client, site_id, drive, pattern_clean, matcher, excel_files, all_excel, semaphore, listing_cache)
+                for drive in drives
+            ))
+            if listing_cache != cached_listings:
+                try:
+                    save_json_cache(FOLDER_LISTING_CACHE_FILE, listing_cache)
+                except OSError as e:
+                    print(f"Could not save folder listing cache: {e}")
         
         if not excel_files:
             print(f"No Excel files found matching '{filename_pattern}'")
             print("Available Excel files:")
-            # List all found Excel files for reference
-            all_excel = await _list_all_excel_files(graph_client, site_id, drives)
+            # List the Excel files the walk came across, for reference
             for file_info in all_excel[:10]:  # Show first 10
                 print(f"  - {file_info['filename']}")
             return None
         
         # Find best match
-        best_match = _find_best_match(excel_files, filename_pattern)
+        best_match = find_best_match(excel_files, pattern_clean, pattern_words)
         print(f"Best match found: {best_match['filename']}")
+        _cache_file_search_result(cache_key, best_match)
         
         return best_match
         
@@ -101,12 +217,32 @@ async def find_excel_file(filename_pattern, context):
         # Basic pattern matching as fallback
         return _fallback_file_search(filename_pattern, site_id, drive_id)
 
-async def _search_items_for_excel(graph_client, site_id, drive_id, items, pattern, excel_files):
-    """Recursively search items for Excel files"""
+async def _walk_drive_for_excel(graph_client, site_id, drive, pattern_clean, matcher, excel_files, all_excel, semaphore, listing_cache):
+    """Walk one document library's folders for Excel files, until an exactly named one is found"""
+    try:
+        # Each level of the tree is listed through $batch; the semaphore is held per level
+        async with aclosing(graph_client.walk_drive(site_id, drive["id"], listing_cache)) as levels:
+            while True:
+                async with semaphore:
+                    items = await anext(levels, None)
+                if items is None or _collect_excel_matches(site_id, drive["id"], items, pattern_clean, matcher, excel_files, all_excel):
+                    break
+    except Exception as e:
+        print(f"Error walking library {drive['name']}: {str(e)}")
+
+def _collect_excel_matches(site_id, drive_id, items, pattern_clean, matcher, excel_files, all_excel=None):
+    """Collect Excel files matching the pattern from drive items
+
+    If all_excel is given, every Excel file seen is also added to it, for listing when nothing matches.
+    Returns True if one of the matches is named exactly like the pattern.
+    """
+    found_exact = False
     for item in items:
         if item.get("file") and item["name"].endswith(('.xlsx', '.xls')):
+            if all_excel is not None:
+                all_excel.append({"filename": item["name"]})
             # Check if file matches pattern
-            if _matches_pattern(item["name"], pattern):
+            if matcher(item["name"]):
                 excel_files.append({
                     "site_id": site_id,
                     "drive_id": drive_id,
@@ -115,91 +251,11 @@ async def _search_items_for_excel(graph_client, site_id, drive_id, items, patter
                     "size": item.get("size", 0),
                     "last_modified": item.get("lastModifiedDateTime", "")
                 })
-        
-        # Search in folders
-        elif item.get("folder"):
-            try:
-                folder_items_response = await graph_client.list_document_contents(site_id, drive_id, item["id"])
-                folder_items = folder_items_response.get("value", [])
-                await _search_items_for_excel(graph_client, site_id, drive_id, folder_items, pattern, excel_files)
-            except Exception as e:
-                print(f"Error searching folder {item['name']}: {str(e)}")
-                continue
+                found_exact = found_exact or is_exact_name(item["name"].lower(), pattern_clean)
+    return found_exact
 
-async def _list_all_excel_files(graph_client, site_id, drives):
-    """List all Excel files for reference"""
-    all_files = []
-    for drive in drives[:3]:  # Limit to first 3 drives
-        try:
-            items_response = await graph_client.list_document_contents(site_id, drive["id"], "root")
-            items = items_response.get("value", [])
-            for item in items:
-                if item.get("file") and item["name"].endswith(('.xlsx', '.xls')):
-                    all_files.append({"filename": item["name"]})
-        except:
-            continue
-    return all_files
-
-def _matches_pattern(filename, pattern):
-    """Check if filename matches the search pattern"""
-    filename_lower = filename.lower()
-    pattern_lower = pattern.lower()
-    
-    # Remove quotes and extra spaces from pattern
-    pattern_clean = pattern_lower.strip().strip("'\"").strip()
-    
-    # Check for exact substring match first
-    if pattern_clean in filename_lower:
-        return True
-    
-    # Extract key terms from pattern (remove common words)
-    import re
-    # Remove file extensions and common words
-    pattern_terms = re.findall(r'\b\w{3,}\b', pattern_clean)
-    pattern_terms = [term for term in pattern_terms if term not in ['xlsx', 'file', 'data', 'folder']]
-    
-    # Check if most key terms are present
-    if len(pattern_terms) == 0:
-        return False
-        
-    matches = sum(1 for term in pattern_terms if term in filename_lower)
-    match_ratio = matches / len(pattern_terms)
-    
-    # Lower threshold for better matching
-    return match_ratio >= 0.4
-
-def _find_best_match(excel_files, pattern):
-    """Find the best matching file from the list"""
-    if len(excel_files) == 1:
-        return excel_files[0]
-    
-    # Score files based on pattern matching
-    scored_files = []
-    pattern_lower = pattern.lower()
-    
-    for file_info in excel_files:
-        filename_lower = file_info["filename"].lower()
-        score = 0
-        
-        # Exact substring match gets highest score
-        if pattern_lower in filename_lower:
-            score += 100
-        
-        # Word matches
-        pattern_words = pattern_lower.split()
-        for word in pattern_words:
-            if word in filename_lower:
-                score += 10
-        
-        # Prefer more recent files (if timestamp available)
-        if file_info.get("last_modified"):
-            score += 1
-            
-        scored_files.append((score, file_info))
-    
-    # Return highest scoring file
-    scored_files.sort(key=lambda x: x[0], reverse=True)
-    return scored_files[0][1]
+# Generic words in a search pattern that say nothing about which file is meant
+_STOP_TERMS = frozenset(('xlsx', 'file', 'data', 'folder'))
 
 def _fallback_file_search(filename_pattern, site_id, drive_id):
     """Fallback search using basic pattern matching"""
@@ -230,7 +286,7 @@ def _fallback_file_search(filename_pattern, site_id, drive_id):
     print(f"No fallback mapping found for '{filename_pattern}'")
     return None
 
-async def analyze_excel_file(filename_pattern, analysis_type="general"):
+async def analyze_excel_file(filename_pattern, analysis_type="general", refresh=False):
     """Analyze any Excel file with detailed function call tracking."""
     
     print("=== GENERAL SHAREPOINT EXCEL ANALYZER ===\n")
@@ -250,7 +306,7 @@ async def analyze_excel_file(filename_pattern, analysis_type="general"):
     # Step 2: Find Target File
     log_function_call(2, "find_excel_file()", "general_excel_analyzer.py:31-102", "IN_PROGRESS")
     try:
-        file_info = await find_excel_file(filename_pattern, context)
+        file_info = await find_excel_file(filename_pattern, context, refresh)
         if not file_info:
             log_function_call(2, "find_excel_file()", "general_excel_analyzer.py:31-102", "FAILED", "File not found")
             return
@@ -261,63 +317,68 @@ async def analyze_excel_file(filename_pattern, analysis_type="general"):
         return
     
     # Step 3: Download Excel File via Graph API
-    log_function_call(3, "requests.get() - Graph API download", "Python requests library", "IN_PROGRESS")
+    log_function_call(3, "GraphClient.download_document()", "utils/graph_client.py", "IN_PROGRESS")
     try:
-        download_url = f"https://graph.microsoft.com/v1.0/sites/{file_info['site_id']}/drives/{file_info['drive_id']}/items/{file_info['item_id']}/content"
-        headers = context.headers.copy()
-        headers.pop("Content-Type", None)  # Remove content-type for download
-        
-        print(f"Download URL: {download_url}")
-        response = requests.get(download_url, headers=headers)
-        
-        if response.status_code == 200:
-            log_function_call(3, "requests.get() - Graph API download", "Python requests library", "SUCCESS")
-            excel_data = BytesIO(response.content)
-            print(f"Downloaded {len(response.content)} bytes")
-        else:
-            raise Exception(f"HTTP {response.status_code}: {response.text}")
+        # Stream the file into a spooled buffer instead of holding the whole response body
+        excel_data = await _get_graph_client(context).download_document(
+            file_info['site_id'], file_info['drive_id'], file_info['item_id']
+        )
+        log_function_call(3, "GraphClient.download_document()", "utils/graph_client.py", "SUCCESS")
+        file_size = excel_data.seek(0, os.SEEK_END)
+        print(f"Downloaded {file_size} bytes")
+        excel_data.seek(0)
             
     except Exception as e:
-        log_function_call(3, "requests.get() - Graph API download", "Python requests library", "FAILED", str(e))
+        log_function_call(3, "GraphClient.download_document()", "utils/graph_client.py", "FAILED", str(e))
+        return
+    
+    # Large workbooks only need aggregates for these analyses, so stream them instead of loading pandas
+    if (file_size > STREAMING_THRESHOLD_BYTES and analysis_type in ("general", "financial")
+            and file_info["filename"].lower().endswith(STREAMING_EXTENSIONS)):
+        await analyze_excel_streaming(excel_data, file_info, analysis_type)
         return
     
     # Step 4: Load Excel with Pandas
-    log_function_call(4, "pd.read_excel()", "pandas library", "IN_PROGRESS")
+    log_function_call(4, "pd.ExcelFile.parse()", "pandas library", "IN_PROGRESS")
     try:
-        # Try to read all sheets first
-        df_dict = pd.read_excel(excel_data, sheet_name=None)
-        sheet_names = list(df_dict.keys())
+        # Open the workbook once; sheets are only parsed on demand, off the event loop
+        excel_file = await asyncio.to_thread(pd.ExcelFile, excel_data, engine=EXCEL_ENGINE)
+        sheet_names = excel_file.sheet_names
         
-        # Use first sheet as primary
-        df = df_dict[sheet_names[0]]
+        # Use first sheet as primary, reading only the header first to pick the columns to load
+        header = await asyncio.to_thread(excel_file.parse, sheet_names[0], nrows=0)
+        usecols = _select_columns(header.columns, analysis_type)
+        df = await asyncio.to_thread(excel_file.parse, sheet_names[0], usecols=usecols)
+        df = await asyncio.to_thread(_compact_dtypes, df)
         
-        log_function_call(4, "pd.read_excel()", "pandas library", "SUCCESS")
+        log_function_call(4, "pd.ExcelFile.parse()", "pandas library", "SUCCESS")
         print(f"Loaded DataFrame: {df.shape[0]} rows × {df.shape[1]} columns")
+        if usecols is not None:
+            print(f"Loaded {len(usecols)} of {len(header.columns)} columns relevant to {analysis_type} analysis")
         print(f"Available sheets: {sheet_names}")
     except Exception as e:
-        log_function_call(4, "pd.read_excel()", "pandas library", "FAILED", str(e))
+        log_function_call(4, "pd.ExcelFile.parse()", "pandas library", "FAILED", str(e))
         return
     
     # Step 5: Basic Data Analysis
     log_function_call(5, "DataFrame analysis methods", "pandas library", "IN_PROGRESS")
     try:
-        print("\n" + "="*60)
-        print("DATASET OVERVIEW")
-        print("="*60)
+        print_section("DATASET OVERVIEW")
         print(f"File: {file_info['filename']}")
         print(f"Sheet: {sheet_names[0]}")
         print(f"Shape: {df.shape}")
         print(f"Columns: {list(df.columns)}")
         
         print(f"\nData Types:")
-        for col, dtype in df.dtypes.items():
-            print(f"  {col}: {dtype}")
+        print(df.dtypes.to_string())
         
         print(f"\nMissing Values:")
-        missing = df.isnull().sum()
-        for col, count in missing.items():
-            if count > 0:
-                print(f"  {col}: {count} missing ({count/len(df)*100:.1f}%)")
+        missing = df.isna().sum()
+        missing = missing[missing > 0]
+        if len(missing) > 0:
+            # One vectorized summary instead of formatting each column in Python
+            summary = pd.DataFrame({"missing": missing, "pct": (missing / len(df) * 100).round(1)})
+            print(summary.to_string())
         
         log_function_call(5, "DataFrame analysis methods", "pandas library", "SUCCESS")
         
@@ -325,25 +386,21 @@ async def analyze_excel_file(filename_pattern, analysis_type="general"):
         log_function_call(5, "DataFrame analysis methods", "pandas library", "FAILED", str(e))
         return
     
-    # Step 6: Analysis Type-Specific Processing
+    # Step 6: Analysis Type-Specific Processing (CPU-bound, so run it in a worker thread)
     if analysis_type == "recruiting":
-        await analyze_recruiting_metrics(df, 6)
+        await asyncio.to_thread(analyze_recruiting_metrics, df, 6)
     elif analysis_type == "financial":
-        await analyze_financial_metrics(df, 6)
+        await asyncio.to_thread(analyze_financial_metrics, df, 6)
     else:
-        await analyze_general_metrics(df, 6)
+        await asyncio.to_thread(analyze_general_metrics, df, 6)
     
     # Step 7: Sample Data Preview
     log_function_call(7, "df.head() and df.describe()", "pandas display methods", "IN_PROGRESS")
     try:
-        print("\n" + "="*60)
-        print("SAMPLE DATA (First 5 rows)")
-        print("="*60)
+        print_section("SAMPLE DATA (First 5 rows)")
         print(df.head())
         
-        print("\n" + "="*60)
-        print("STATISTICAL SUMMARY")
-        print("="*60)
+        print_section("STATISTICAL SUMMARY")
         numeric_cols = df.select_dtypes(include=['number']).columns
         if len(numeric_cols) > 0:
             print(df[numeric_cols].describe())
@@ -355,34 +412,196 @@ async def analyze_excel_file(filename_pattern, analysis_type="general"):
     except Exception as e:
         log_function_call(7, "df.head() and df.describe()", "pandas display methods", "FAILED", str(e))
     
-    print("\n" + "="*60)
-    print("ANALYSIS COMPLETE")
-    print("="*60)
+    print_section("ANALYSIS COMPLETE")
+    print("All function calls and their locations have been documented above.")
+
+def _excel_row_stream(excel_data):
+    """Yield the rows of the first worksheet as value tuples, without loading the whole workbook"""
+    import openpyxl
+    workbook = openpyxl.load_workbook(excel_data, read_only=True, data_only=True)
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+def _stream_column_stats(rows, preview_size=5):
+    """Accumulate per-column counts, sums, minimums, maximums and distinct values in one pass
+    
+    Returns the column names, the per-column stats, the first preview_size rows and the row count.
+    """
+    header = next(rows, None)
+    if header is None:
+        return [], [], [], 0
+    columns = [str(name) if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)]
+    stats = [
+        {"count": 0, "missing": 0, "sum": 0, "min": None, "max": None, "numeric": True, "values": set()}
+        for _ in columns
+    ]
+    preview = []
+    row_count = 0
+    
+    for row in rows:
+        row_count += 1
+        if len(preview) < preview_size:
+            preview.append(row[:len(columns)])
+        for value, col in zip(row, stats):
+            if value is None:
+                col["missing"] += 1
+                continue
+            col["count"] += 1
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                col["sum"] += value
+                if col["min"] is None or value < col["min"]:
+                    col["min"] = value
+                if col["max"] is None or value > col["max"]:
+                    col["max"] = value
+            else:
+                col["numeric"] = False
+                if col["values"] is not None:
+                    col["values"].add(value)
+                    if len(col["values"]) > STREAMING_MAX_UNIQUE:
+                        col["values"] = None
+        # Short rows are missing their trailing cells
+        for col in stats[len(row):]:
+            col["missing"] += 1
+    
+    return columns, stats, preview, row_count
+
+async def analyze_excel_streaming(excel_data, file_info, analysis_type):
+    """Analyze a large workbook from streamed rows, keeping only per-column aggregates in memory"""
+    # Step 4: Stream rows with openpyxl
+    log_function_call(4, "openpyxl iter_rows(read_only=True)", "openpyxl library", "IN_PROGRESS")
+    try:
+        columns, stats, preview, row_count = await asyncio.to_thread(
+            _stream_column_stats, _excel_row_stream(excel_data)
+        )
+        log_function_call(4, "openpyxl iter_rows(read_only=True)", "openpyxl library", "SUCCESS")
+        print(f"Streamed {row_count} rows × {len(columns)} columns")
+    except Exception as e:
+        log_function_call(4, "openpyxl iter_rows(read_only=True)", "openpyxl library", "FAILED", str(e))
+        return
+    
+    numeric = {name: col for name, col in zip(columns, stats) if col["numeric"] and col["count"]}
+    
+    # Step 5: Basic Data Analysis
+    log_function_call(5, "Streamed column statistics", "general_excel_analyzer.py", "IN_PROGRESS")
+    print_section("DATASET OVERVIEW")
+    print(f"File: {file_info['filename']}")
+    print(f"Shape: ({row_count}, {len(columns)})")
+    print(f"Columns: {columns}")
+    
+    print("\nMissing Values:")
+    for name, col in zip(columns, stats):
+        if col["missing"] > 0:
+            print(f"  {name}: {col['missing']} missing ({col['missing']/row_count*100:.1f}%)")
+    log_function_call(5, "Streamed column statistics", "general_excel_analyzer.py", "SUCCESS")
+    
+    # Step 6: Analysis Type-Specific Processing
+    log_function_call(6, f"Streamed {analysis_type} metrics", "general_excel_analyzer.py", "IN_PROGRESS")
+    print_section(f"{analysis_type.upper()} METRICS")
+    if analysis_type == "financial":
+        financial_cols = [
+            name for name in numeric
+            if any(word in name.lower() for word in ['cost', 'fee', 'budget', 'revenue', 'expense', 'amount'])
+        ]
+        if financial_cols:
+            for name in financial_cols:
+                col = numeric[name]
+                print(f"{name}: Total=${col['sum']:,.2f}, Average=${col['sum'] / col['count']:,.2f}")
+        else:
+            print("No financial columns detected")
+    else:
+        if numeric:
+            print("NUMERIC COLUMNS SUMMARY:")
+            for name, col in numeric.items():
+                print(f"  {name}: Sum={col['sum']:.2f}, Mean={col['sum'] / col['count']:.2f}, Max={col['max']:.2f}")
+        
+        categorical = [(name, col) for name, col in zip(columns, stats) if not col["numeric"]]
+        if categorical:
+            print("\nCATEGORICAL COLUMNS:")
+            for name, col in categorical[:5]:  # Limit to first 5
+                if col["values"] is None:
+                    print(f"  {name}: {STREAMING_MAX_UNIQUE}+ unique values")
+                    continue
+                print(f"  {name}: {len(col['values'])} unique values")
+                if len(col["values"]) <= 10:
+                    print(f"    Values: {list(col['values'])}")
+    log_function_call(6, f"Streamed {analysis_type} metrics", "general_excel_analyzer.py", "SUCCESS")
+    
+    # Step 7: Sample Data Preview (the only DataFrame built on this path)
+    log_function_call(7, "pd.DataFrame(preview rows)", "pandas display methods", "IN_PROGRESS")
+    print_section("SAMPLE DATA (First 5 rows)")
+    print(pd.DataFrame(preview, columns=columns))
+    
+    print_section("STATISTICAL SUMMARY")
+    if numeric:
+        print(pd.DataFrame({
+            name: {"count": col["count"], "mean": col["sum"] / col["count"], "min": col["min"], "max": col["max"]}
+            for name, col in numeric.items()
+        }))
+    else:
+        print("No numeric columns found for statistical summary")
+    log_function_call(7, "pd.DataFrame(preview rows)", "pandas display methods", "SUCCESS")
+    
+    print_section("ANALYSIS COMPLETE")
     print("All function calls and their locations have been documented above.")
 
-async def analyze_recruiting_metrics(df, step_num):
+def _select_columns(columns, analysis_type):
+    """Pick the columns a specialized analysis uses, or None to load them all"""
+    keywords = ANALYSIS_COLUMN_KEYWORDS.get(analysis_type)
+    if not keywords:
+        return None
+    selected = [col for col in columns if any(word in str(col).lower() for word in keywords)]
+    return selected or None
+
+def _compact_dtypes(df):
+    """Shrink integer columns and repetitive text columns so aggregations scan less memory
+
+    Floats keep float64, so financial totals are not rounded to float32 precision.
+    """
+    for col in df.select_dtypes(include=['integer']).columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    if len(df) > 0:
+        for col in df.select_dtypes(include=['object', 'string']).columns:
+            if df[col].nunique() / len(df) < 0.5:
+                df[col] = df[col].astype("category")
+    return df
+
+def analyze_recruiting_metrics(df, step_num):
     """Analyze recruiting-specific metrics"""
     log_function_call(step_num, "Recruiting metrics calculation", "pandas aggregation methods", "IN_PROGRESS")
     try:
-        print("\n" + "="*60)
-        print("RECRUITING METRICS")
-        print("="*60)
+        print_section("RECRUITING METRICS")
         
-        # Find relevant columns
-        metrics = {}
+        # Find relevant columns (a later matching column replaces an earlier one); only numeric
+        # columns are aggregated, so text columns such as "Offer Status" are skipped
+        numeric_cols = set(df.select_dtypes(include=['number']).columns)
+        sum_cols = {}
+        days_col = None
         for col in df.columns:
+            if col not in numeric_cols:
+                continue
             col_lower = col.lower()
             if 'application' in col_lower or 'applicant' in col_lower:
-                metrics['Total Applications'] = df[col].sum()
+                sum_cols['Total Applications'] = col
             elif 'recruiter' in col_lower and 'screen' in col_lower:
-                metrics['Recruiter Screens'] = df[col].sum()
+                sum_cols['Recruiter Screens'] = col
             elif 'hiring' in col_lower and 'screen' in col_lower:
-                metrics['Hiring Manager Screens'] = df[col].sum()
+                sum_cols['Hiring Manager Screens'] = col
             elif 'offer' in col_lower:
-                metrics['Total Offers'] = df[col].sum()
+                sum_cols['Total Offers'] = col
             elif 'days' in col_lower and ('open' in col_lower or 'fill' in col_lower):
-                metrics['Avg Time to Fill'] = f"{df[col].mean():.1f} days"
-                metrics['Time Range'] = f"{df[col].min()}-{df[col].max()} days"
+                days_col = col
+        
+        # One aggregation call per group instead of a column scan per statistic
+        metrics = {}
+        if sum_cols:
+            totals = df[list(sum_cols.values())].sum()
+            metrics.update({metric: totals[col] for metric, col in sum_cols.items()})
+        if days_col is not None:
+            days = df[days_col].agg(["mean", "min", "max"])
+            metrics['Avg Time to Fill'] = f"{days['mean']:.1f} days"
+            metrics['Time Range'] = f"{days['min']:g}-{days['max']:g} days"
         
         for metric, value in metrics.items():
             print(f"{metric}: {value}")
@@ -396,9 +615,10 @@ async def analyze_recruiting_metrics(df, step_num):
         
         if recruiter_col:
             print(f"\nTOP PERFORMERS (by {recruiter_col}):")
-            performance = df.groupby(recruiter_col).agg({
+            # The recruiter column may be categorical; only list recruiters present in the data
+            performance = df.groupby(recruiter_col, observed=True).agg({
                 col: 'sum' for col in df.columns 
-                if any(word in col.lower() for word in ['application', 'offer', 'screen'])
+                if col in numeric_cols and any(word in col.lower() for word in ['application', 'offer', 'screen'])
             })
             print(performance.head(10))
         
@@ -407,13 +627,11 @@ async def analyze_recruiting_metrics(df, step_num):
     except Exception as e:
         log_function_call(step_num, "Recruiting metrics calculation", "pandas aggregation methods", "FAILED", str(e))
 
-async def analyze_financial_metrics(df, step_num):
+def analyze_financial_metrics(df, step_num):
     """Analyze financial-specific metrics"""
     log_function_call(step_num, "Financial metrics calculation", "pandas aggregation methods", "IN_PROGRESS")
     try:
-        print("\n" + "="*60)
-        print("FINANCIAL METRICS")
-        print("="*60)
+        print_section("FINANCIAL METRICS")
         
         # Find financial columns
         financial_cols = []
@@ -423,10 +641,9 @@ async def analyze_financial_metrics(df, step_num):
                 financial_cols.append(col)
         
         if financial_cols:
+            stats = df[financial_cols].agg(["sum", "mean"])
             for col in financial_cols:
-                total = df[col].sum()
-                avg = df[col].mean()
-                print(f"{col}: Total=${total:,.2f}, Average=${avg:,.2f}")
+                print(f"{col}: Total=${stats.at['sum', col]:,.2f}, Average=${stats.at['mean', col]:,.2f}")
         else:
             print("No financial columns detected")
         
@@ -435,28 +652,28 @@ async def analyze_financial_metrics(df, step_num):
     except Exception as e:
         log_function_call(step_num, "Financial metrics calculation", "pandas aggregation methods", "FAILED", str(e))
 
-async def analyze_general_metrics(df, step_num):
+def analyze_general_metrics(df, step_num):
     """Analyze general metrics for any dataset"""
     log_function_call(step_num, "General metrics calculation", "pandas aggregation methods", "IN_PROGRESS")
     try:
-        print("\n" + "="*60)
-        print("GENERAL METRICS")
-        print("="*60)
+        print_section("GENERAL METRICS")
         
         # Numeric column analysis
         numeric_cols = df.select_dtypes(include=['number']).columns
         if len(numeric_cols) > 0:
             print("NUMERIC COLUMNS SUMMARY:")
-            for col in numeric_cols:
-                print(f"  {col}: Sum={df[col].sum():.2f}, Mean={df[col].mean():.2f}, Max={df[col].max():.2f}")
+            # One column per statistic, one row per column, printed as a single table
+            stats = df[numeric_cols].agg(["sum", "mean", "max"]).T
+            print(stats.to_string(float_format=lambda x: f"{x:.2f}"))
         
         # Categorical column analysis
-        categorical_cols = df.select_dtypes(include=['object']).columns
+        categorical_cols = df.select_dtypes(include=['object', 'string', 'category']).columns[:5]  # Limit to first 5
         if len(categorical_cols) > 0:
             print(f"\nCATEGORICAL COLUMNS:")
-            for col in categorical_cols[:5]:  # Limit to first 5
-                unique_count = df[col].nunique()
+            unique_counts = df[categorical_cols].nunique()
+            for col, unique_count in unique_counts.items():
                 print(f"  {col}: {unique_count} unique values")
+                # Only list the values of low-cardinality columns
                 if unique_count <= 10:
                     print(f"    Values: {list(df[col].unique())}")
         
@@ -471,20 +688,22 @@ def main():
     parser.add_argument('filename', help='Name or pattern of Excel file to analyze')
     parser.add_argument('--type', choices=['general', 'recruiting', 'financial'], 
                        default='general', help='Type of analysis to perform')
+    parser.add_argument('--refresh', action='store_true',
+                       help='Ignore cached file search results and search SharePoint again')
     
     args = parser.parse_args()
     
-    import asyncio
-    asyncio.run(analyze_excel_file(args.filename, args.type))
+    asyncio.run(analyze_excel_file(args.filename, args.type, args.refresh))
 
 if __name__ == "__main__":
+    setup_step_logging()
+    
     # If no command line args, run interactively
     if len(sys.argv) == 1:
         print("=== Interactive Mode ===")
         filename = input("Enter Excel filename or pattern: ")
         analysis_type = input("Analysis type (general/recruiting/financial) [general]: ").strip() or "general"
         
-        import asyncio
         asyncio.run(analyze_excel_file(filename, analysis_type))
     else:
         main()
@@ -4,80 +4,117 @@ PowerPoint Analyzer for SharePoint Files
 Analyzes PowerPoint files on SharePoint by extracting text content
 """
 
+import asyncio
 import os
 import sys
-import requests
-from io import BytesIO
-from datetime import datetime
+import logging
 import zipfile
-import xml.etree.ElementTree as ET
+from contextlib import aclosing
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from lxml import etree
 import re
 import argparse
 
+# Upper bound on concurrent Graph requests, to stay clear of throttling
+MAX_CONCURRENT_REQUESTS = 16
+
 # Add the project root to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from auth.sharepoint_auth import get_auth_context
+from utils.fuzzy_match import find_best_match, is_exact_name, make_matcher, prepare_pattern
+from utils.json_cache import load_json_cache, save_json_cache
+
+# Step log (handlers and levels are configured by the script that runs the analysis)
+logger = logging.getLogger("powerpoint_analyzer")
+logger.addHandler(logging.NullHandler())
+
+def setup_step_logging():
+    """Write the step log to stdout alongside the report (the analyze tools capture stdout)"""
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("[%(asctime)s] %(message)s", "%H:%M:%S"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+def print_section(title):
+    """Print a section banner with a single write"""
+    print(f"\n{'=' * 60}\n{title}\n{'=' * 60}")
 
 def log_function_call(step, function_name, file_location, status="SUCCESS", error=None):
-    """Log each function call with its location and status"""
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    print(f"\n[{timestamp}] Step {step}: {function_name}")
-    print(f"File: {file_location}")
-    print(f"Status: {status}")
+    """Log each function call with its location and status, as one line"""
     if error:
-        print(f"Error: {error}")
-    print("-" * 60)
+        logger.info("Step %s: %s | %s | %s | Error: %s", step, function_name, file_location, status, error)
+    else:
+        logger.info("Step %s: %s | %s | %s", step, function_name, file_location, status)
+
+# Graph client shared by the search and download steps (it reuses the context's pooled session)
+_graph_client = None
+
+def _get_graph_client(context):
+    """Return the Graph client for this auth context, creating it only when the context changes"""
+    global _graph_client
+    if _graph_client is None or _graph_client.context is not context:
+        from utils.graph_client import GraphClient
+        _graph_client = GraphClient(context)
+    return _graph_client
 
 async def find_powerpoint_file(filename_pattern, context):
     """Find PowerPoint file on SharePoint by name pattern"""
     print(f"Searching for PowerPoint file matching: '{filename_pattern}'")
     
     try:
-        from utils.graph_client import GraphClient
-        from config.settings import SHAREPOINT_CONFIG
+        from config.settings import FOLDER_LISTING_CACHE_FILE, SHAREPOINT_DOMAIN, SHAREPOINT_SITE_NAME
         
-        # Create Graph client
-        graph_client = GraphClient(context)
+        # Reuse the shared Graph client
+        graph_client = _get_graph_client(context)
         
-        # Get site info dynamically
-        site_parts = SHAREPOINT_CONFIG["site_url"].replace("https://", "").split("/")
-        domain = site_parts[0]
-        site_name = site_parts[2] if len(site_parts) > 2 else "root"
-        site_info = await graph_client.get_site_info(domain, site_name)
+        # Get site info and document libraries dynamically; neither depends on the other, so fetch both at once
+        site_info, libraries_response = await asyncio.gather(
+            graph_client.get_site_info(SHAREPOINT_DOMAIN, SHAREPOINT_SITE_NAME),
+            graph_client.list_document_libraries(SHAREPOINT_DOMAIN, SHAREPOINT_SITE_NAME),
+        )
         site_id = site_info["id"]
-        
-        # Get document libraries dynamically
-        libraries_response = await graph_client.list_document_libraries(domain, site_name)
         drives = libraries_response.get("value", [])
         
         print(f"Found {len(drives)} document libraries to search")
         
-        # Search for PowerPoint files in all drives
+        # Search for PowerPoint files in all drives concurrently
         pptx_files = []
-        for drive in drives:
-            drive_id = drive["id"]
-            drive_name = drive["name"]
-            print(f"Searching in library: {drive_name}")
-            
+        pattern_clean, pattern_terms, pattern_words = prepare_pattern(filename_pattern, _STOP_TERMS)
+        matcher = make_matcher(pattern_clean, pattern_terms)
+        query = filename_pattern.strip().strip("'\"")
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        # Set once any drive finds an exactly named file, so the other searches stop early
+        stop_event = asyncio.Event()
+        # Folder listings from earlier walks, reused while their folders' cTags/eTags still match
+        listing_cache = load_json_cache(FOLDER_LISTING_CACHE_FILE)
+        cached_listings = dict(listing_cache)
+        await _run_until_stopped([
+            _search_drive_for_powerpoint(graph_client, site_id, drive, query, pattern_clean, matcher, pptx_files, semaphore, stop_event, listing_cache)
+            for drive in drives
+        ], stop_event)
+        # Graph search matches whole words, so abbreviations ("q3deck") and partial term matches
+        # never come back from it; walk the libraries' folders with the local matcher instead
+        if not pptx_files:
+            print("No search hits, walking the library folders")
+            await _run_until_stopped([
+                _walk_drive_for_powerpoint(graph_client, site_id, drive, pattern_clean, matcher, pptx_files, semaphore, stop_event, listing_cache)
+                for drive in drives
+            ], stop_event)
+        if listing_cache != cached_listings:
             try:
-                # Get root folder contents
-                items_response = await graph_client.list_document_contents(site_id, drive_id, "root")
-                items = items_response.get("value", [])
-                
-                # Search through folders and files
-                await _search_items_for_powerpoint(graph_client, site_id, drive_id, items, filename_pattern, pptx_files)
-                
-            except Exception as e:
-                print(f"Error searching drive {drive_name}: {str(e)}")
-                continue
+                save_json_cache(FOLDER_LISTING_CACHE_FILE, listing_cache)
+            except OSError as e:
+                print(f"Could not save folder listing cache: {e}")
         
         if not pptx_files:
             print(f"No PowerPoint files found matching '{filename_pattern}'")
             return None
         
         # Find best match
-        best_match = _find_best_match(pptx_files, filename_pattern)
+        best_match = find_best_match(pptx_files, pattern_clean, pattern_words)
         print(f"Best match found: {best_match['filename']}")
         
         return best_match
@@ -86,12 +123,64 @@ async def find_powerpoint_file(filename_pattern, context):
         print(f"Error in PowerPoint file search: {str(e)}")
         return None
 
-async def _search_items_for_powerpoint(graph_client, site_id, drive_id, items, pattern, pptx_files):
-    """Recursively search items for PowerPoint files"""
+async def _run_until_stopped(coros, stop_event):
+    """Run the drive searches concurrently, cancelling those still running once stop_event is set"""
+    tasks = [asyncio.create_task(coro) for coro in coros]
+    all_done = asyncio.gather(*tasks, return_exceptions=True)
+    stop_waiter = asyncio.create_task(stop_event.wait())
+    try:
+        await asyncio.wait({all_done, stop_waiter}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        stop_waiter.cancel()
+        await asyncio.gather(all_done, stop_waiter, return_exceptions=True)
+
+async def _search_drive_for_powerpoint(graph_client, site_id, drive, query, pattern_clean, matcher, pptx_files, semaphore, stop_event, listing_cache):
+    """Search one document library for PowerPoint files, unless stop_event is already set"""
+    print(f"Searching in library: {drive['name']}")
+    try:
+        # Graph searches the whole library (all folders) in one paged query
+        async with semaphore:
+            if stop_event.is_set():
+                return
+            items = await graph_client.search_drive(
+                site_id, drive["id"], query,
+                select=["id", "name", "size", "lastModifiedDateTime", "file", "folder"]
+            )
+    except Exception as e:
+        print(f"Search failed in library {drive['name']} ({str(e)}), walking its folders instead")
+        await _walk_drive_for_powerpoint(graph_client, site_id, drive, pattern_clean, matcher, pptx_files, semaphore, stop_event, listing_cache)
+        return
+    
+    if _search_items_for_powerpoint(site_id, drive["id"], items, pattern_clean, matcher, pptx_files):
+        stop_event.set()
+
+async def _walk_drive_for_powerpoint(graph_client, site_id, drive, pattern_clean, matcher, pptx_files, semaphore, stop_event, listing_cache):
+    """Walk one document library's folders for PowerPoint files, until stop_event is set"""
+    try:
+        # Each level of the tree is listed through $batch; the semaphore is held per level
+        async with aclosing(graph_client.walk_drive(site_id, drive["id"], listing_cache)) as levels:
+            while not stop_event.is_set():
+                async with semaphore:
+                    items = await anext(levels, None)
+                if items is None:
+                    break
+                if _search_items_for_powerpoint(site_id, drive["id"], items, pattern_clean, matcher, pptx_files):
+                    stop_event.set()
+    except Exception as e:
+        print(f"Error searching drive {drive['name']}: {str(e)}")
+
+def _search_items_for_powerpoint(site_id, drive_id, items, pattern_clean, matcher, pptx_files):
+    """Collect PowerPoint files matching the pattern from drive items
+
+    Returns True if one of the matches is named exactly like the pattern.
+    """
+    found_exact = False
     for item in items:
         if item.get("file") and item["name"].endswith(('.pptx', '.ppt')):
             # Check if file matches pattern
-            if _matches_pattern(item["name"], pattern):
+            if matcher(item["name"]):
                 pptx_files.append({
                     "site_id": site_id,
                     "drive_id": drive_id,
@@ -100,172 +189,143 @@ async def _search_items_for_powerpoint(graph_client, site_id, drive_id, items, p
                     "size": item.get("size", 0),
                     "last_modified": item.get("lastModifiedDateTime", "")
                 })
-        
-        # Search in folders
-        elif item.get("folder"):
-            try:
-                folder_items_response = await graph_client.list_document_contents(site_id, drive_id, item["id"])
-                folder_items = folder_items_response.get("value", [])
-                await _search_items_for_powerpoint(graph_client, site_id, drive_id, folder_items, pattern, pptx_files)
-            except Exception as e:
-                print(f"Error searching folder {item['name']}: {str(e)}")
-                continue
+                found_exact = found_exact or is_exact_name(item["name"].lower(), pattern_clean)
+    return found_exact
 
-def _matches_pattern(filename, pattern):
-    """Check if filename matches the search pattern"""
-    filename_lower = filename.lower()
-    pattern_lower = pattern.lower()
-    
-    # Remove quotes and extra spaces from pattern
-    pattern_clean = pattern_lower.strip().strip("'\"").strip()
-    
-    # Check for exact substring match first
-    if pattern_clean in filename_lower:
-        return True
-    
-    # Extract key terms from pattern
-    import re
-    pattern_terms = re.findall(r'\b\w{3,}\b', pattern_clean)
-    pattern_terms = [term for term in pattern_terms if term not in ['pptx', 'ppt', 'file', 'powerpoint', 'presentation']]
-    
-    # Check if most key terms are present
-    if len(pattern_terms) == 0:
-        return False
-        
-    matches = sum(1 for term in pattern_terms if term in filename_lower)
-    match_ratio = matches / len(pattern_terms)
-    
-    return match_ratio >= 0.4
+# Generic words in a search pattern that say nothing about which file is meant
+_STOP_TERMS = frozenset(('pptx', 'ppt', 'file', 'powerpoint', 'presentation'))
 
-def _find_best_match(pptx_files, pattern):
-    """Find the best matching file from the list"""
-    if len(pptx_files) == 1:
-        return pptx_files[0]
-    
-    # Score files based on pattern matching
-    scored_files = []
-    pattern_lower = pattern.lower()
-    
-    for file_info in pptx_files:
-        filename_lower = file_info["filename"].lower()
-        score = 0
-        
-        # Exact substring match gets highest score
-        if pattern_lower in filename_lower:
-            score += 100
-        
-        # Word matches
-        pattern_words = pattern_lower.split()
-        for word in pattern_words:
-            if word in filename_lower:
-                score += 10
-        
-        # Prefer more recent files
-        if file_info.get("last_modified"):
-            score += 1
-            
-        scored_files.append((score, file_info))
-    
-    # Return highest scoring file
-    scored_files.sort(key=lambda x: x[0], reverse=True)
-    return scored_files[0][1]
+# DrawingML text runs (<a:t>) hold all the visible text on a slide
+_TEXT_XPATH = etree.XPath(
+    '//a:t/text()', namespaces={'a': 'http://schemas.openxmlformats.org/drawingml/2006/main'}, smart_strings=False
+)
+_SLIDE_FILE_RE = re.compile(r'ppt/slides/slide(\d+)\.xml')
+
+def _slide_text(slide):
+    """Extract the text of one slide, given its (file name, XML bytes)"""
+    slide_file, slide_xml = slide
+    try:
+        # A fresh parser per call, since lxml parsers must not be shared between threads
+        root = etree.fromstring(slide_xml, etree.XMLParser(remove_blank_text=True, resolve_entities=False))
+        # Whitespace-only runs are dropped, so no empty pieces go into the join
+        return ' '.join(filter(None, map(str.strip, _TEXT_XPATH(root))))
+    except Exception as e:
+        print(f"Error processing {slide_file}: {str(e)}")
+        return ''
 
 def extract_text_from_pptx(pptx_data):
     """Extract text content from PowerPoint file"""
     try:
         # PowerPoint files are ZIP archives
         with zipfile.ZipFile(pptx_data, 'r') as zip_file:
-            slides_text = []
-            slide_files = [f for f in zip_file.namelist() if f.startswith('ppt/slides/slide') and f.endswith('.xml')]
-            slide_files.sort()  # Ensure proper order
-            
-            for slide_file in slide_files:
-                try:
-                    slide_xml = zip_file.read(slide_file)
-                    root = ET.fromstring(slide_xml)
-                    
-                    # Extract all text elements
-                    text_elements = []
-                    for elem in root.iter():
-                        if elem.tag.endswith('}t'):  # Text elements
-                            if elem.text:
-                                text_elements.append(elem.text.strip())
-                    
-                    slide_text = ' '.join(text_elements)
-                    if slide_text.strip():
-                        slides_text.append(slide_text)
-                        
-                except Exception as e:
-                    print(f"Error processing {slide_file}: {str(e)}")
-                    continue
+            slide_numbers = {}
+            for info in zip_file.infolist():
+                match = _SLIDE_FILE_RE.fullmatch(info.filename)
+                if match:
+                    slide_numbers[info] = int(match.group(1))
             
-            return slides_text
+            # Inflate every slide up front on this thread, since the archive handle is not
+            # thread-safe. Entries are read in archive order so the buffer is read front to back
+            payloads = {
+                info: zip_file.read(info)
+                for info in sorted(slide_numbers, key=lambda info: info.header_offset)
+            }
+            # Ensure slide order (slide2 before slide10)
+            slides = [
+                (info.filename, payloads[info])
+                for info in sorted(slide_numbers, key=slide_numbers.get)
+            ]
+        
+        # Parse the slides in parallel; libxml2 releases the GIL while it parses
+        workers = min(len(slides), os.cpu_count() or 1)
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                texts = list(executor.map(_slide_text, slides))
+        else:
+            texts = [_slide_text(slide) for slide in slides]
+        
+        return [text for text in texts if text.strip()]
             
     except Exception as e:
         print(f"Error extracting text from PowerPoint: {str(e)}")
         return []
 
-def analyze_hr_metrics(slides_text):
-    """Analyze HR-specific metrics from slide text"""
-    print("\n" + "="*60)
-    print("HR REPORTING ANALYSIS")
-    print("="*60)
-    
-    all_text = ' '.join(slides_text).lower()
-    
-    # Extract key metrics
-    metrics = {}
-    
-    # Look for hiring numbers
-    hire_patterns = [
+# HR metrics pulled from slide text: (metric, value format, keywords, patterns in order of
+# preference). Every pattern of a metric contains one of its keywords, so a deck without any of
+# them cannot match that metric. Matching ignores case, so the deck text is never lower-cased
+_HR_METRIC_PATTERNS = (
+    # Hiring numbers
+    ("Total Hires", "{}", ("hire",), (
         r'(\d+)\s*(?:total\s*)?(?:global\s*)?hires?',
         r'hires?[:\s]*(\d+)',
-        r'(\d+)\s*hires?\s*(?:globally|total)'
-    ]
-    
-    for pattern in hire_patterns:
-        matches = re.findall(pattern, all_text)
-        if matches:
-            metrics['Total Hires'] = matches[0]
-            break
-    
-    # Look for time to hire
-    time_patterns = [
+        r'(\d+)\s*hires?\s*(?:globally|total)',
+    )),
+    # Time to hire
+    ("Time to Hire (days)", "{}", ("day", "hire"), (
         r'(\d+)\s*days?\s*(?:vs|versus)',
         r'time\s*to\s*hire[:\s]*(\d+)',
-        r'(\d+)\s*days?\s*(?:goal|target)'
-    ]
-    
-    for pattern in time_patterns:
-        matches = re.findall(pattern, all_text)
-        if matches:
-            metrics['Time to Hire (days)'] = matches[0]
-            break
-    
-    # Look for acceptance rates
-    acceptance_patterns = [
+        r'(\d+)\s*days?\s*(?:goal|target)',
+    )),
+    # Acceptance rates
+    ("Offer Acceptance Rate", "{}%", ("%",), (
         r'(\d+)%\s*(?:acceptance|offer)',
-        r'acceptance[:\s]*(\d+)%'
-    ]
-    
-    for pattern in acceptance_patterns:
-        matches = re.findall(pattern, all_text)
-        if matches:
-            metrics['Offer Acceptance Rate'] = f"{matches[0]}%"
-            break
-    
-    # Look for open positions
-    open_patterns = [
+        r'acceptance[:\s]*(\d+)%',
+    )),
+    # Open positions
+    ("Open Positions", "{}", ("open",), (
         r'(\d+)\s*(?:total\s*)?(?:open|opening)s?',
         r'open\s*positions?[:\s]*(\d+)',
-        r'(\d+)\s*positions?\s*open'
-    ]
+        r'(\d+)\s*positions?\s*open',
+    )),
+)
+
+@lru_cache(maxsize=None)
+def _hr_metric_regex(metric_indices):
+    """Fuse the patterns of the given metrics into one regex, so the deck text is scanned once
+
+    Each pattern sits in a lookahead named p<metric>_<pattern>, so matches never consume
+    text another pattern needs.
+    """
+    return re.compile('|'.join(
+        f'(?=(?P<p{metric_index}_{pattern_index}>{pattern}))'
+        for metric_index in metric_indices
+        for pattern_index, pattern in enumerate(_HR_METRIC_PATTERNS[metric_index][3])
+    ), re.IGNORECASE)
+
+_HR_KEYWORDS = frozenset(keyword for _, _, keywords, _ in _HR_METRIC_PATTERNS for keyword in keywords)
+_HR_KEYWORD_RE = re.compile('|'.join(map(re.escape, sorted(_HR_KEYWORDS))), re.IGNORECASE)
+
+def analyze_hr_metrics(slides_text):
+    """Analyze HR-specific metrics from slide text"""
+    print_section("HR REPORTING ANALYSIS")
+    
+    all_text = ' '.join(slides_text)
     
-    for pattern in open_patterns:
-        matches = re.findall(pattern, all_text)
-        if matches:
-            metrics['Open Positions'] = matches[0]
+    # Only look for metrics whose keywords occur in the text, stopping once every keyword is seen
+    found_keywords = set()
+    for match in _HR_KEYWORD_RE.finditer(all_text):
+        found_keywords.add(match.group().lower())
+        if len(found_keywords) == len(_HR_KEYWORDS):
             break
+    candidates = tuple(
+        metric_index for metric_index, (_, _, keywords, _) in enumerate(_HR_METRIC_PATTERNS)
+        if found_keywords.intersection(keywords)
+    )
+    
+    # Extract key metrics: the first match of each pattern, in one pass over the text
+    first_matches = {}
+    for match in (_hr_metric_regex(candidates).finditer(all_text) if candidates else ()):
+        metric_index, pattern_index = map(int, match.lastgroup[1:].split('_'))
+        # The pattern's own number group directly follows its named group
+        first_matches.setdefault((metric_index, pattern_index), match.group(match.lastindex + 1))
+    
+    # Each metric takes its value from the most preferred pattern that matched anywhere
+    metrics = {}
+    for metric_index, (metric, value_format, _, patterns) in enumerate(_HR_METRIC_PATTERNS):
+        for pattern_index in range(len(patterns)):
+            if (metric_index, pattern_index) in first_matches:
+                metrics[metric] = value_format.format(first_matches[(metric_index, pattern_index)])
+                break
     
     # Display metrics
     if metrics:
@@ -307,30 +367,26 @@ async def analyze_powerpoint_file(filename_pattern):
         return
     
     # Step 3: Download PowerPoint File via Graph API
-    log_function_call(3, "requests.get() - Graph API download", "Python requests library", "IN_PROGRESS")
+    log_function_call(3, "GraphClient.download_document()", "utils/graph_client.py", "IN_PROGRESS")
     try:
-        download_url = f"https://graph.microsoft.com/v1.0/sites/{file_info['site_id']}/drives/{file_info['drive_id']}/items/{file_info['item_id']}/content"
-        headers = context.headers.copy()
-        headers.pop("Content-Type", None)  # Remove content-type for download
-        
-        print(f"Download URL: {download_url}")
-        response = requests.get(download_url, headers=headers)
-        
-        if response.status_code == 200:
-            log_function_call(3, "requests.get() - Graph API download", "Python requests library", "SUCCESS")
-            pptx_data = BytesIO(response.content)
-            print(f"Downloaded {len(response.content)} bytes")
-        else:
-            raise Exception(f"HTTP {response.status_code}: {response.text}")
+        # Stream the file into a spooled buffer instead of holding the whole response body
+        pptx_data = await _get_graph_client(context).download_document(
+            file_info['site_id'], file_info['drive_id'], file_info['item_id']
+        )
+        log_function_call(3, "GraphClient.download_document()", "utils/graph_client.py", "SUCCESS")
+        print(f"Downloaded {pptx_data.seek(0, os.SEEK_END)} bytes")
+        pptx_data.seek(0)
             
     except Exception as e:
-        log_function_call(3, "requests.get() - Graph API download", "Python requests library", "FAILED", str(e))
+        log_function_call(3, "GraphClient.download_document()", "utils/graph_client.py", "FAILED", str(e))
         return
     
     # Step 4: Extract Text from PowerPoint
     log_function_call(4, "extract_text_from_pptx()", "XML parsing with zipfile", "IN_PROGRESS")
     try:
-        slides_text = extract_text_from_pptx(pptx_data)
+        # Parse off the event loop, then release the buffer (and any spilled temp file)
+        with pptx_data:
+            slides_text = await asyncio.to_thread(extract_text_from_pptx, pptx_data)
         log_function_call(4, "extract_text_from_pptx()", "XML parsing with zipfile", "SUCCESS")
         print(f"Extracted text from {len(slides_text)} slides")
     except Exception as e:
@@ -349,14 +405,12 @@ async def analyze_powerpoint_file(filename_pattern):
     # Step 6: Display Slide Content
     log_function_call(6, "Display slide content", "Text processing", "IN_PROGRESS")
     try:
-        print("\n" + "="*60)
-        print("SLIDE BY SLIDE CONTENT")
-        print("="*60)
+        print_section("SLIDE BY SLIDE CONTENT")
         
         for i, slide_text in enumerate(slides_text, 1):
             print(f"\n--- SLIDE {i} ---")
             # Clean up text for better readability
-            cleaned_text = re.sub(r'\s+', ' ', slide_text).strip()
+            cleaned_text = ' '.join(slide_text.split())
             if len(cleaned_text) > 500:
                 print(cleaned_text[:500] + "...")
             else:
@@ -367,9 +421,7 @@ async def analyze_powerpoint_file(filename_pattern):
     except Exception as e:
         log_function_call(6, "Display slide content", "Text processing", "FAILED", str(e))
     
-    print("\n" + "="*60)
-    print("ANALYSIS COMPLETE")
-    print("="*60)
+    print_section("ANALYSIS COMPLETE")
     print("PowerPoint content has been extracted and analyzed.")
 
 def main():
@@ -379,16 +431,16 @@ def main():
     
     args = parser.parse_args()
     
-    import asyncio
     asyncio.run(analyze_powerpoint_file(args.filename))
 
 if __name__ == "__main__":
+    setup_step_logging()
+    
     # If no command line args, run interactively
     if len(sys.argv) == 1:
         print("=== Interactive Mode ===")
         filename = input("Enter PowerPoint filename or pattern: ")
         
-        import asyncio
         asyncio.run(analyze_powerpoint_file(filename))
     else:
         main()
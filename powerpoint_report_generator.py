@@ -13,24 +13,33 @@ from pptx.dml.color import RGBColor
 from pptx.enum.shapes import MSO_SHAPE
 from pptx.chart.data import CategoryChartData
 from pptx.enum.chart import XL_CHART_TYPE, XL_LEGEND_POSITION
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-import io
 import asyncio
-import logging
 from datetime import datetime
-import numpy as np
 from io import BytesIO
-import base64
-import requests
-import asyncio
+import re
+import time
+import zipfile
+from urllib.parse import quote
 
 # Add the project root to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from auth.sharepoint_auth import get_auth_context
-from utils.graph_client import GraphClient
-from config.settings import SHAREPOINT_CONFIG
+from utils.graph_client import GraphAPIError, GraphClient
+from utils.json_cache import atomic_write, load_json_cache, save_json_cache
+from config.settings import (
+    SHAREPOINT_DOMAIN,
+    SHAREPOINT_SITE_ENDPOINT,
+    SHAREPOINT_SITE_NAME,
+    REPORT_DECK_CACHE_FILE,
+    UPLOAD_TARGET_CACHE_FILE,
+    UPLOAD_TARGET_CACHE_TTL,
+)
+
+# Folder in the Documents library that generated reports are uploaded to
+REPORTS_FOLDER_NAME = "AI Generated Reports"
+
+_SLIDE_PART_RE = re.compile(r"ppt/slides/slide\d+\.xml$")
 
 def create_recruiting_presentation():
     """Create a comprehensive recruiting analysis PowerPoint presentation"""
@@ -46,7 +55,7 @@ def create_recruiting_presentation():
     create_title_slide(prs)
     
     # Slide 2: Executive Summary
-    create_executive_summary_slide(prs)
+    _build_text_slide(prs, *_TEXT_SLIDES["executive_summary"])
     
     # Slide 3: Key Performance Metrics
     create_kpi_slide(prs)
@@ -55,16 +64,47 @@ def create_recruiting_presentation():
     create_recruiter_performance_slide(prs)
     
     # Slide 5: Time to Hire Analysis
-    create_time_to_hire_slide(prs)
+    _build_text_slide(prs, *_TEXT_SLIDES["time_to_hire"])
     
     # Slide 6: 2023 vs 2024 Comparison
     create_comparison_slide(prs)
     
     # Slide 7: Recommendations
-    create_recommendations_slide(prs)
+    _build_text_slide(prs, *_TEXT_SLIDES["recommendations"])
     
     return prs
 
+def get_recruiting_presentation():
+    """Return the saved recruiting presentation as a BytesIO positioned at the start
+
+    The slides are static, so the rendered deck is kept in REPORT_DECK_CACHE_FILE and only
+    rebuilt when this module is newer than the cached copy.
+    """
+    try:
+        if os.path.getmtime(REPORT_DECK_CACHE_FILE) >= os.path.getmtime(__file__):
+            with open(REPORT_DECK_CACHE_FILE, 'rb') as deck_file:
+                return BytesIO(deck_file.read())
+    except OSError:
+        pass
+    
+    pptx_buffer = BytesIO()
+    create_recruiting_presentation().save(pptx_buffer)
+    pptx_buffer.seek(0)
+    
+    # Swap in a fully written file so a concurrent run never reads a torn deck
+    try:
+        atomic_write(REPORT_DECK_CACHE_FILE, pptx_buffer.getvalue())
+    except OSError as e:
+        print(f"Could not save presentation cache: {e}")
+    return pptx_buffer
+
+def count_slides(pptx_buffer):
+    """Count the slides in a saved presentation without loading it"""
+    with zipfile.ZipFile(pptx_buffer) as pptx_zip:
+        count = sum(1 for name in pptx_zip.namelist() if _SLIDE_PART_RE.match(name))
+    pptx_buffer.seek(0)
+    return count
+
 def add_blue_banner_header(slide, title_text):
     """Add a blue banner header to the top of a slide with white bold text"""
     # Create a rectangle shape for the blue banner
@@ -129,13 +169,70 @@ def create_title_slide(prs):
     subtitle_paragraph.font.color.rgb = RGBColor(68, 84, 106)
     subtitle_paragraph.alignment = PP_ALIGN.CENTER  # Center the subtitle
 
-def create_executive_summary_slide(prs):
-    """Create executive summary slide"""
+def _bullets(size, *texts):
+    """Paragraph specs for level-1 bullets in the given font size"""
+    return [{"text": text, "level": 1, "size": size} for text in texts]
+
+# Banner title and paragraph specs for the slides that are a single block of text
+_TEXT_SLIDES = {
+    "executive_summary": ("Executive Summary", [
+        {"text": "Key Highlights from 2023 Recruiting Performance", "size": 16, "bold": True},
+        *_bullets(
+            14,
+            "106 positions successfully filled across diverse roles and locations",
+            "39,694 total applications processed (684 average per position)",
+            "74.5 days average time to fill (improved to 44-50 days in 2024)",
+            "Top recruiters: Karrin (volume leader) and Jenna (best conversion rate)",
+            "70% of positions filled through internal recruiting (cost-effective approach)",
+        ),
+    ]),
+    "time_to_hire": ("Time to Hire Analysis", [
+        {"text": "2023 Time to Fill Distribution"},
+        *_bullets(
+            18,
+            "Average: 74.5 days",
+            "Median: 55 days",
+            "Range: 3 - 400 days",
+            "25th Percentile: 36 days",
+            "75th Percentile: 85.5 days",
+        ),
+        {"text": ""},
+        {"text": "2024 Improvement: Reduced to 44-50 days average", "size": 16, "bold": True, "color": (0, 128, 0)},
+    ]),
+    "recommendations": ("Strategic Recommendations", [
+        {"text": "Immediate Actions", "size": 16, "bold": True},
+        *_bullets(
+            12,
+            "Improve data quality - address 45% missing application data",
+            "Standardize processes - reduce time-to-hire variance",
+            "Share best practices from high-performing recruiters",
+        ),
+        {"text": ""},
+        {"text": "Strategic Initiatives", "size": 16, "bold": True},
+        *_bullets(
+            12,
+            "Set specific time-to-hire targets by role type",
+            "Investigate roles taking >90 days to fill",
+            "Implement consistent conversion rate tracking",
+        ),
+        {"text": ""},
+        {"text": "Long-term Planning", "size": 16, "bold": True},
+        *_bullets(
+            12,
+            "Plan for 100-120 annual hires based on 2023 data",
+            "Optimize recruiter assignments based on performance",
+            "Understand factors causing 400-day outliers",
+        ),
+    ]),
+}
+
+def _build_text_slide(prs, title_text, paragraphs):
+    """Create a bannered slide with one text box built from paragraph specs"""
     slide_layout = prs.slide_layouts[6]  # Blank layout to avoid conflicts with banner
     slide = prs.slides.add_slide(slide_layout)
     
     # Add blue banner header
-    add_blue_banner_header(slide, "Executive Summary")
+    add_blue_banner_header(slide, title_text)
     
     # Add content text box below banner
     content = slide.shapes.add_textbox(
@@ -145,38 +242,19 @@ def create_executive_summary_slide(prs):
         height=Inches(6.0)
     )
     tf = content.text_frame
-    tf.text = "Key Highlights from 2023 Recruiting Performance"
-    
-    # Style the main text with smaller font
-    main_paragraph = tf.paragraphs[0]
-    main_paragraph.font.size = Pt(16)
-    main_paragraph.font.bold = True
-    
-    # Add bullet points with smaller font sizes
-    p = tf.add_paragraph()
-    p.text = "106 positions successfully filled across diverse roles and locations"
-    p.level = 1
-    p.font.size = Pt(14)
-    
-    p = tf.add_paragraph()
-    p.text = "39,694 total applications processed (684 average per position)"
-    p.level = 1
-    p.font.size = Pt(14)
-    
-    p = tf.add_paragraph()
-    p.text = "74.5 days average time to fill (improved to 44-50 days in 2024)"
-    p.level = 1
-    p.font.size = Pt(14)
-    
-    p = tf.add_paragraph()
-    p.text = "Top recruiters: Karrin (volume leader) and Jenna (best conversion rate)"
-    p.level = 1
-    p.font.size = Pt(14)
-    
-    p = tf.add_paragraph()
-    p.text = "70% of positions filled through internal recruiting (cost-effective approach)"
-    p.level = 1
-    p.font.size = Pt(14)
+    
+    for i, spec in enumerate(paragraphs):
+        p = tf.paragraphs[0] if i == 0 else tf.add_paragraph()
+        p.text = spec["text"]
+        if "level" in spec:
+            p.level = spec["level"]
+        font = p.font
+        if "size" in spec:
+            font.size = Pt(spec["size"])
+        if spec.get("bold"):
+            font.bold = True
+        if "color" in spec:
+            font.color.rgb = RGBColor(*spec["color"])
 
 def create_kpi_slide(prs):
     """Create KPI slide with key metrics"""
@@ -256,48 +334,6 @@ def create_recruiter_performance_slide(prs):
     chart.has_legend = True
     chart.legend.position = XL_LEGEND_POSITION.BOTTOM
 
-def create_time_to_hire_slide(prs):
-    """Create time to hire analysis slide"""
-    slide_layout = prs.slide_layouts[6]  # Blank layout
-    slide = prs.slides.add_slide(slide_layout)
-    
-    # Add blue banner header
-    add_blue_banner_header(slide, "Time to Hire Analysis")
-    
-    # Add content with statistics
-    content = slide.shapes.add_textbox(
-        left=Inches(0.5),
-        top=Inches(1.0),
-        width=Inches(12.33),
-        height=Inches(6.0)
-    )
-    tf = content.text_frame
-    tf.text = "2023 Time to Fill Distribution"
-    
-    # Add statistics
-    stats = [
-        "Average: 74.5 days",
-        "Median: 55 days",
-        "Range: 3 - 400 days",
-        "25th Percentile: 36 days",
-        "75th Percentile: 85.5 days"
-    ]
-    
-    for stat in stats:
-        p = tf.add_paragraph()
-        p.text = stat
-        p.level = 1
-        p.font.size = Pt(18)
-    
-    # Add improvement note
-    p = tf.add_paragraph()
-    p.text = ""
-    p = tf.add_paragraph()
-    p.text = "2024 Improvement: Reduced to 44-50 days average"
-    p.font.size = Pt(16)
-    p.font.bold = True
-    p.font.color.rgb = RGBColor(0, 128, 0)
-
 def create_comparison_slide(prs):
     """Create 2023 vs 2024 comparison slide"""
     slide_layout = prs.slide_layouts[6]  # Blank layout
@@ -335,83 +371,113 @@ def create_comparison_slide(prs):
                     paragraph.font.color.rgb = RGBColor(255, 255, 255)
                     paragraph.font.bold = True
 
-def create_recommendations_slide(prs):
-    """Create recommendations slide"""
-    slide_layout = prs.slide_layouts[6]  # Blank layout
-    slide = prs.slides.add_slide(slide_layout)
-    
-    # Add blue banner header
-    add_blue_banner_header(slide, "Strategic Recommendations")
-    
-    # Add content
-    content = slide.shapes.add_textbox(
-        left=Inches(0.5),
-        top=Inches(1.0),
-        width=Inches(12.33),
-        height=Inches(6.0)
+async def _resolve_upload_target(graph_client):
+    """Find the site, Documents library and AI Generated Reports folder IDs, creating the folder if needed"""
+    # Get site info and document libraries; neither depends on the other, so fetch both at once
+    site_info, libraries_response = await asyncio.gather(
+        graph_client.get_site_info(SHAREPOINT_DOMAIN, SHAREPOINT_SITE_NAME),
+        graph_client.list_document_libraries(SHAREPOINT_DOMAIN, SHAREPOINT_SITE_NAME),
     )
-    tf = content.text_frame
-    tf.text = "Immediate Actions"
+    site_id = site_info["id"]
+    drives = libraries_response.get("value", [])
     
-    # Style the main text with smaller font
-    main_paragraph = tf.paragraphs[0]
-    main_paragraph.font.size = Pt(16)
-    main_paragraph.font.bold = True
+    # Find Documents library
+    documents_drive = None
+    for drive in drives:
+        if drive["name"] == "Documents":
+            documents_drive = drive
+            break
     
-    immediate_actions = [
-        "Improve data quality - address 45% missing application data",
-        "Standardize processes - reduce time-to-hire variance",
-        "Share best practices from high-performing recruiters"
-    ]
+    if not documents_drive:
+        raise Exception("Documents library not found")
     
-    for action in immediate_actions:
-        p = tf.add_paragraph()
-        p.text = action
-        p.level = 1
-        p.font.size = Pt(12)
-    
-    # Add strategic initiatives
-    p = tf.add_paragraph()
-    p.text = ""
-    p = tf.add_paragraph()
-    p.text = "Strategic Initiatives"
-    p.font.bold = True
-    p.font.size = Pt(16)
-    
-    strategic_items = [
-        "Set specific time-to-hire targets by role type",
-        "Investigate roles taking >90 days to fill",
-        "Implement consistent conversion rate tracking"
-    ]
+    drive_id = documents_drive["id"]
     
-    for item in strategic_items:
-        p = tf.add_paragraph()
-        p.text = item
-        p.level = 1
-        p.font.size = Pt(12)
-    
-    # Add long-term planning
-    p = tf.add_paragraph()
-    p.text = ""
-    p = tf.add_paragraph()
-    p.text = "Long-term Planning"
-    p.font.bold = True
-    p.font.size = Pt(16)
-    
-    longterm_items = [
-        "Plan for 100-120 annual hires based on 2023 data",
-        "Optimize recruiter assignments based on performance",
-        "Understand factors causing 400-day outliers"
-    ]
+    print("📁 Looking for AI Generated Reports folder...")
+    
+    # Check if AI Generated Reports folder exists, create if not. The folder is addressed
+    # by path inside a $batch request, so a missing folder comes back as a 404 status
+    # instead of an exception and the root listing is never paged through
+    try:
+        responses = await graph_client.batch([{
+            "id": "folder",
+            "method": "GET",
+            "url": f"/sites/{site_id}/drives/{drive_id}/root:/{quote(REPORTS_FOLDER_NAME)}?$select=id,name,folder",
+        }])
+        folder_response = responses.get("folder", {})
+        status = folder_response.get("status")
+        if status not in (200, 404):
+            raise Exception(f"Folder lookup failed with status {status}: {folder_response.get('body')}")
+        
+        ai_reports_folder = folder_response.get("body") if status == 200 else None
+        if ai_reports_folder and not ai_reports_folder.get("folder"):
+            ai_reports_folder = None
+        
+        if not ai_reports_folder:
+            print("📂 Creating AI Generated Reports folder...")
+            # Create folder using Graph API
+            folder_data = {
+                "name": REPORTS_FOLDER_NAME,
+                "folder": {},
+                "@microsoft.graph.conflictBehavior": "rename"
+            }
+            
+            try:
+                ai_reports_folder = await graph_client.post(f"sites/{site_id}/drives/{drive_id}/root/children", folder_data)
+            except Exception as e:
+                raise Exception(f"Failed to create folder: {str(e)}")
+            print("✅ AI Generated Reports folder created")
+        
+        folder_id = ai_reports_folder["id"]
+        
+    except Exception as e:
+        print(f"❌ Error accessing folder: {str(e)}")
+        raise
     
-    for item in longterm_items:
-        p = tf.add_paragraph()
-        p.text = item
-        p.level = 1
-        p.font.size = Pt(12)
+    return site_id, drive_id, folder_id
+
+def _load_upload_target():
+    """Return the cached (site_id, drive_id, folder_id) for this site, or None if missing or expired"""
+    entry = load_json_cache(UPLOAD_TARGET_CACHE_FILE).get(SHAREPOINT_SITE_ENDPOINT)
+    if not entry or entry.get("expires", 0) <= time.time():
+        return None
+    return entry["site_id"], entry["drive_id"], entry["folder_id"]
+
+def _save_upload_target(target):
+    """Remember the upload target IDs for UPLOAD_TARGET_CACHE_TTL seconds, or forget them when target is None"""
+    cache = load_json_cache(UPLOAD_TARGET_CACHE_FILE)
+    if target is None:
+        cache.pop(SHAREPOINT_SITE_ENDPOINT, None)
+    else:
+        site_id, drive_id, folder_id = target
+        cache[SHAREPOINT_SITE_ENDPOINT] = {
+            "expires": time.time() + UPLOAD_TARGET_CACHE_TTL,
+            "site_id": site_id,
+            "drive_id": drive_id,
+            "folder_id": folder_id,
+        }
+    try:
+        save_json_cache(UPLOAD_TARGET_CACHE_FILE, cache)
+    except OSError as e:
+        print(f"Could not save upload target cache: {e}")
+
+async def _upload_presentation(graph_client, target, filename, pptx_buffer):
+    """Upload the presentation into the target folder through a resumable upload session"""
+    site_id, drive_id, folder_id = target
+    return await graph_client.upload_large_file(
+        f"sites/{site_id}/drives/{drive_id}/items/{folder_id}:/{filename}:",
+        pptx_buffer,
+    )
 
 async def upload_to_sharepoint(prs, filename="2023_Recruiting_Analysis_Presentation.pptx"):
-    """Upload PowerPoint presentation to SharePoint AI Generated Reports folder"""
+    """Upload PowerPoint presentation to SharePoint AI Generated Reports folder
+
+    prs is either a Presentation or an already saved deck, such as the BytesIO returned
+    by get_recruiting_presentation.
+
+    The site, library and folder IDs are cached on disk for an hour, so repeat uploads
+    go straight to the PUT. A 404 from a cached target re-resolves the IDs once.
+    """
     try:
         print("🔐 Authenticating with SharePoint...")
         context = await get_auth_context()
@@ -419,91 +485,45 @@ async def upload_to_sharepoint(prs, filename="2023_Recruiting_Analysis_Presentat
         # Create Graph client
         graph_client = GraphClient(context)
         
-        # Get site info
-        site_parts = SHAREPOINT_CONFIG["site_url"].replace("https://", "").split("/")
-        domain = site_parts[0]
-        site_name = site_parts[2] if len(site_parts) > 2 else "root"
-        site_info = await graph_client.get_site_info(domain, site_name)
-        site_id = site_info["id"]
-        
-        # Get document libraries
-        libraries_response = await graph_client.list_document_libraries(domain, site_name)
-        drives = libraries_response.get("value", [])
-        
-        # Find Documents library
-        documents_drive = None
-        for drive in drives:
-            if drive["name"] == "Documents":
-                documents_drive = drive
-                break
-        
-        if not documents_drive:
-            raise Exception("Documents library not found")
-        
-        drive_id = documents_drive["id"]
+        target = _load_upload_target()
+        from_cache = target is not None
+        if from_cache:
+            print("📁 Using cached AI Generated Reports folder")
+        else:
+            target = await _resolve_upload_target(graph_client)
+            _save_upload_target(target)
         
-        print("📁 Looking for AI Generated Reports folder...")
+        if hasattr(prs, "save"):
+            print("💾 Saving presentation to memory...")
+            # Save presentation to BytesIO (off the event loop); the buffer itself is uploaded, not a copy
+            pptx_buffer = BytesIO()
+            await asyncio.to_thread(prs.save, pptx_buffer)
+            pptx_buffer.seek(0)
+        else:
+            pptx_buffer = prs
         
-        # Check if AI Generated Reports folder exists, create if not
+        print("📤 Uploading to SharePoint...")
+        # Upload file to AI Generated Reports folder; the ranges are sent from a worker thread
         try:
-            items_response = await graph_client.list_document_contents(site_id, drive_id, "root")
-            items = items_response.get("value", [])
-            
-            ai_reports_folder = None
-            for item in items:
-                if item.get("folder") and item["name"] == "AI Generated Reports":
-                    ai_reports_folder = item
-                    break
-            
-            if not ai_reports_folder:
-                print("📂 Creating AI Generated Reports folder...")
-                # Create folder using Graph API
-                create_folder_url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drives/{drive_id}/root/children"
-                folder_data = {
-                    "name": "AI Generated Reports",
-                    "folder": {},
-                    "@microsoft.graph.conflictBehavior": "rename"
-                }
-                
-                response = requests.post(create_folder_url, headers=context.headers, json=folder_data)
-                if response.status_code == 201:
-                    ai_reports_folder = response.json()
-                    print("✅ AI Generated Reports folder created")
-                else:
-                    raise Exception(f"Failed to create folder: {response.text}")
-            
-            folder_id = ai_reports_folder["id"]
-            
+            try:
+                upload_result = await _upload_presentation(graph_client, target, filename, pptx_buffer)
+            except Exception as e:
+                # A cached folder may have been deleted or moved since it was resolved
+                if not (from_cache and isinstance(e, GraphAPIError) and e.status_code == 404):
+                    raise
+                print("📁 Cached folder not found, looking it up again...")
+                _save_upload_target(None)
+                target = await _resolve_upload_target(graph_client)
+                _save_upload_target(target)
+                upload_result = await _upload_presentation(graph_client, target, filename, pptx_buffer)
         except Exception as e:
-            print(f"❌ Error accessing folder: {str(e)}")
-            raise
-        
-        print("💾 Saving presentation to memory...")
-        # Save presentation to BytesIO
-        pptx_buffer = BytesIO()
-        prs.save(pptx_buffer)
-        pptx_buffer.seek(0)
-        pptx_content = pptx_buffer.getvalue()
-        
-        print("📤 Uploading to SharePoint...")
-        # Upload file to AI Generated Reports folder
-        upload_url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drives/{drive_id}/items/{folder_id}:/{filename}:/content"
+            raise Exception(f"Upload failed: {str(e)}")
         
-        upload_headers = context.headers.copy()
-        upload_headers.pop("Content-Type", None)  # Remove content-type for binary upload
-        upload_headers["Content-Type"] = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
-        
-        response = requests.put(upload_url, headers=upload_headers, data=pptx_content)
-        
-        if response.status_code in [200, 201]:
-            upload_result = response.json()
-            print(f"✅ PowerPoint uploaded successfully to SharePoint!")
-            print(f"📊 File: {filename}")
-            print(f"📁 Location: AI Generated Reports folder")
-            print(f"🔗 SharePoint URL: {upload_result.get('webUrl', 'N/A')}")
-            return upload_result
-        else:
-            raise Exception(f"Upload failed: HTTP {response.status_code} - {response.text}")
+        print(f"✅ PowerPoint uploaded successfully to SharePoint!")
+        print(f"📊 File: {filename}")
+        print(f"📁 Location: AI Generated Reports folder")
+        print(f"🔗 SharePoint URL: {upload_result.get('webUrl', 'N/A')}")
+        return upload_result
             
     except Exception as e:
         print(f"❌ Error uploading to SharePoint: {str(e)}")
@@ -514,14 +534,13 @@ async def main():
     print("Generating 2023 Recruiting Analysis PowerPoint Presentation...")
     
     try:
-        # Create presentation
-        prs = create_recruiting_presentation()
+        # Create presentation, or reuse the deck rendered by an earlier run
+        prs = get_recruiting_presentation()
         
-        print(f"📊 Generated {len(prs.slides)} slides with comprehensive analysis")
+        print(f"📊 Generated {count_slides(prs)} slides with comprehensive analysis")
         print("📈 Includes: KPIs, Charts, Comparisons, and Recommendations")
         
         # Upload to SharePoint instead of saving locally
-        from datetime import datetime
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"2023_Recruiting_Analysis_Presentation_{timestamp}.pptx"
         upload_result = await upload_to_sharepoint(prs, filename)
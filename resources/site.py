@@ -1,12 +1,21 @@
 """SharePoint site information resources."""
 
-import json
-import requests
+import asyncio
+import time
+from typing import Dict, Tuple
+
+import orjson
 from mcp.server.fastmcp import FastMCP, Context
 
 from auth.sharepoint_auth import refresh_token_if_needed
 from utils.graph_client import GraphClient
-from config.settings import SHAREPOINT_CONFIG
+from config.settings import SHAREPOINT_CONFIG, SHAREPOINT_SITE_ENDPOINT
+
+# Rendered site info is reused for this many seconds, since site metadata rarely changes
+SITE_INFO_CACHE_TTL = 60
+
+# Graph base URL -> (monotonic expiry, rendered site info)
+_SITE_INFO_CACHE: Dict[str, Tuple[float, str]] = {}
 
 def register_site_resources(mcp: FastMCP):
     """Register SharePoint site resources with the MCP server."""
@@ -17,23 +26,22 @@ def register_site_resources(mcp: FastMCP):
         await refresh_token_if_needed(ctx.request_context.lifespan_context)
         sp_ctx = ctx.request_context.lifespan_context
         
+        cached = _SITE_INFO_CACHE.get(sp_ctx.graph_url)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
         # Create Graph client
         graph_client = GraphClient(sp_ctx)
         
         try:
-            # Extract site domain and name from site URL
-            site_parts = SHAREPOINT_CONFIG["site_url"].replace("https://", "").split("/")
-            domain = site_parts[0]
-            site_name = site_parts[2] if len(site_parts) > 2 else "root"
-            
             # Get site information via Microsoft Graph API
-            site_url = f"{sp_ctx.graph_url}/sites/{domain}:/sites/{site_name}"
-            response = requests.get(site_url, headers=sp_ctx.headers)
+            site_url = f"{sp_ctx.graph_url}{SHAREPOINT_SITE_ENDPOINT}"
+            response = await asyncio.to_thread(sp_ctx.session.get, site_url, headers=sp_ctx.headers)
             
             if response.status_code != 200:
                 return f"Error retrieving site info: {response.status_code} - {response.text}"
             
-            site_info = response.json()
+            site_info = orjson.loads(response.content)
             
             # Format the output
             result = {
@@ -44,7 +52,9 @@ def register_site_resources(mcp: FastMCP):
                 "web_url": site_info.get("webUrl", SHAREPOINT_CONFIG["site_url"])
             }
             
-            return json.dumps(result, indent=2)
+            body = orjson.dumps(result, option=orjson.OPT_INDENT_2).decode()
+            _SITE_INFO_CACHE[sp_ctx.graph_url] = (time.monotonic() + SITE_INFO_CACHE_TTL, body)
+            return body
         except Exception as e:
             return f"Error accessing SharePoint: {str(e)}"
     
@@ -67,8 +77,8 @@ def register_site_resources(mcp: FastMCP):
             if response.status_code != 200:
                 return f"Error retrieving site info: {response.status_code} - {response.text}"
             
-            site_info = response.json()
-            return json.dumps(site_info, indent=2)
+            site_info = orjson.loads(response.content)
+            return orjson.dumps(site_info, option=orjson.OPT_INDENT_2).decode()
         except Exception as e:
             return f"Error accessing SharePoint: {str(e)}"
     """
@@ -83,7 +93,7 @@ def register_site_resources(mcp: FastMCP):
         try:
             # ライブラリ名を使用してドキュメントを取得する処理
             # ...
-            return json.dumps(result, indent=2)
+            return orjson.dumps(result, option=orjson.OPT_INDENT_2).decode()
         except Exception as e:
             return f"Error accessing document library: {str(e)}"
     """
\ No newline at end of file
@@ -2,6 +2,7 @@
 
 import os
 import sys
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from collections.abc import AsyncIterator
@@ -9,7 +10,7 @@ from datetime import datetime, timedelta
 
 from mcp.server.fastmcp import FastMCP
 
-from auth.sharepoint_auth import SharePointContext, get_auth_context
+from auth.sharepoint_auth import SharePointContext, get_auth_context, refresh_token_periodically
 from config.settings import APP_NAME, DEBUG
 
 # Set logging level
@@ -24,6 +25,7 @@ from tools.site_tools import register_site_tools
 async def sharepoint_lifespan(server: FastMCP) -> AsyncIterator[SharePointContext]:
     """Manage SharePoint connection lifecycle."""
     logger.info("Initializing SharePoint connection...")
+    refresher = None
     
     try:
         # Get SharePoint authentication context
@@ -31,6 +33,9 @@ async def sharepoint_lifespan(server: FastMCP) -> AsyncIterator[SharePointContex
         context = await get_auth_context()
         logger.info(f"Authentication successful. Token expiry: {context.token_expiry}")
         
+        # Refresh the token in the background before it expires
+        refresher = asyncio.create_task(refresh_token_periodically(context))
+        
         # Yield context for use in the application
         yield context
         
@@ -48,6 +53,8 @@ async def sharepoint_lifespan(server: FastMCP) -> AsyncIterator[SharePointContex
         yield error_context
         
     finally:
+        if refresher:
+            refresher.cancel()
         logger.info("Ending SharePoint connection...")
 
 # Create MCP server at module level so CLI can find it
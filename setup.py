@@ -23,12 +23,19 @@ setup(
         "mcp>=0.1.0",
         "msal>=1.20.0",
         "requests>=2.28.0",
+        "orjson>=3.8.0",
         "pandas>=1.5.0",
+        "lxml>=4.9.0",
         "python-dotenv>=0.21.0",
     ],
     extras_require={
+        "fast-excel": [
+            "pandas>=2.2",
+            "python-calamine>=0.2.0",
+        ],
         "dev": [
             "pytest>=7.0.0",
+            "pytest-asyncio>=0.21.0",
             "black>=22.3.0",
             "ruff>=0.0.169",
         ],
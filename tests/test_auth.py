@@ -3,7 +3,12 @@ import pytest
 from unittest.mock import patch, MagicMock
 from datetime import datetime, timedelta
 
-from auth.sharepoint_auth import SharePointContext
+import base64
+import json
+
+from auth import sharepoint_auth
+from auth.sharepoint_auth import SharePointContext, decode_token_claims
+from config.settings import parse_site_url
 
 def test_sharepoint_context_headers():
     """Test that headers are correctly generated from context."""
@@ -15,6 +20,11 @@ def test_sharepoint_context_headers():
     headers = context.headers
     assert headers["Authorization"] == "Bearer test_token"
     assert headers["Content-Type"] == "application/json"
+    
+    # Headers are reused until the token changes
+    assert context.headers is headers
+    context.access_token = "new_token"
+    assert context.headers["Authorization"] == "Bearer new_token"
 
 def test_token_expiry():
     """Test token expiry checking."""
@@ -32,6 +42,13 @@ def test_token_expiry():
     )
     assert context.is_token_valid() == False
     
+    # Token inside the expiry safety margin
+    context = SharePointContext(
+        access_token="test_token",
+        token_expiry=datetime.now() + timedelta(seconds=30)
+    )
+    assert context.is_token_valid() == False
+    
     # Null expiry
     context = SharePointContext(
         access_token="test_token",
@@ -39,13 +56,42 @@ def test_token_expiry():
     )
     assert context.is_token_valid() == False
 
-@patch('requests.get')
-def test_test_connection(mock_get):
+def test_needs_refresh():
+    """Test that tokens are refreshed ahead of expiry."""
+    # Token well outside the refresh window
+    context = SharePointContext(
+        access_token="test_token",
+        token_expiry=datetime.now() + timedelta(hours=1)
+    )
+    assert context.needs_refresh() == False
+    
+    # Token still valid but inside the refresh window
+    context = SharePointContext(
+        access_token="test_token",
+        token_expiry=datetime.now() + timedelta(minutes=2)
+    )
+    assert context.is_token_valid() == True
+    assert context.needs_refresh() == True
+
+def test_refresh_window_is_inside_msal_cache_window():
+    """Test that a refresh only starts once MSAL no longer serves the cached token."""
+    context = SharePointContext(
+        access_token="test_token",
+        token_expiry=datetime.now() + timedelta(minutes=5, seconds=30)
+    )
+    assert context.needs_refresh() == False
+
+@patch('requests.Session.post')
+def test_test_connection(mock_post):
     """Test the connection test method."""
-    # Setup mock response
+    # Setup mock $batch response
     mock_response = MagicMock()
     mock_response.status_code = 200
-    mock_get.return_value = mock_response
+    mock_response.content = json.dumps({"responses": [
+        {"id": "site", "status": 200, "body": {"id": "contoso.sharepoint.com,site-guid,web-guid"}},
+        {"id": "drives", "status": 200, "body": {"value": [{"id": "drive-id"}]}},
+    ]}).encode()
+    mock_post.return_value = mock_response
     
     # Create context
     context = SharePointContext(
@@ -56,10 +102,217 @@ def test_test_connection(mock_get):
     # Test with environment variables
     with patch.dict('os.environ', {'SITE_URL': 'https://contoso.sharepoint.com/sites/test'}):
         assert context.test_connection() == True
+        assert context.site_id == "contoso.sharepoint.com,site-guid,web-guid"
+        assert context.drive_id == "drive-id"
+        assert mock_post.call_args.args[0] == "https://graph.microsoft.com/v1.0/$batch"
         
     # Test failure case
     mock_response.status_code = 401
-    mock_get.return_value = mock_response
+    mock_post.return_value = mock_response
     
     with patch.dict('os.environ', {'SITE_URL': 'https://contoso.sharepoint.com/sites/test'}):
-        assert context.test_connection() == False
\ No newline at end of file
+        assert context.test_connection() == False
+    
+    # Test failure of the site lookup inside the batch
+    mock_response.status_code = 200
+    mock_response.content = json.dumps({"responses": [
+        {"id": "site", "status": 404, "body": {"error": {"code": "itemNotFound"}}},
+    ]}).encode()
+    
+    with patch.dict('os.environ', {'SITE_URL': 'https://contoso.sharepoint.com/sites/test'}):
+        assert context.test_connection() == False
+
+def test_decode_token_claims():
+    """Test JWT payload decoding."""
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": 1700000000, "roles": ["Sites.Read.All"]}).encode()).decode().rstrip("=")
+    claims = decode_token_claims(f"header.{payload}.signature")
+    assert claims["exp"] == 1700000000
+    assert claims["roles"] == ["Sites.Read.All"]
+    
+    # Malformed tokens decode to no claims
+    assert decode_token_claims("test_token") == {}
+
+
+def test_parse_site_url():
+    """Test splitting a site URL into domain and site name."""
+    assert parse_site_url("https://contoso.sharepoint.com/sites/test") == ("contoso.sharepoint.com", "test")
+    assert parse_site_url("https://contoso.sharepoint.com/sites/test/?web=1") == ("contoso.sharepoint.com", "test")
+    assert parse_site_url("https://contoso.sharepoint.com/") == ("contoso.sharepoint.com", "root")
+
+@patch('auth.sharepoint_auth._load_token_cache')
+@patch('msal.ConfidentialClientApplication')
+def test_msal_app_is_reused(mock_app_class, mock_load_cache):
+    """Test that the MSAL application is built once and shared."""
+    with patch('auth.sharepoint_auth._APP', None):
+        first = sharepoint_auth._get_msal_app()
+        second = sharepoint_auth._get_msal_app()
+    
+    assert first is second
+    mock_app_class.assert_called_once()
+    mock_load_cache.assert_called_once()
+
+async def test_refresh_in_window_does_not_block():
+    """Test that a still-valid token is refreshed in the background."""
+    context = SharePointContext(
+        access_token="old_token",
+        token_expiry=datetime.now() + timedelta(minutes=2)
+    )
+    new_context = SharePointContext(
+        access_token="new_token",
+        token_expiry=datetime.now() + timedelta(hours=1)
+    )
+    
+    with patch('auth.sharepoint_auth.get_auth_context', return_value=new_context):
+        await sharepoint_auth.refresh_token_if_needed(context)
+        
+        # The caller keeps the current token while the refresh runs
+        assert context.access_token == "old_token"
+        await context.refresh_task
+    
+    assert context.access_token == "new_token"
+    assert context.needs_refresh() == False
+
+async def test_ensure_site_ids_uses_cache():
+    """Test that cached site IDs skip the lookup."""
+    context = SharePointContext(
+        access_token="test_token",
+        token_expiry=datetime.now() + timedelta(hours=1),
+        site_id="site-id"
+    )
+    
+    with patch.object(SharePointContext, 'test_connection') as mock_probe:
+        await context.ensure_site_ids()
+        mock_probe.assert_not_called()
+        
+        context.site_id = None
+        await context.ensure_site_ids()
+        mock_probe.assert_called_once()
+
+def test_save_token_cache_replaces_file_atomically(tmp_path):
+    """Test the token cache is written in full and no temp files are left behind"""
+    cache_file = tmp_path / ".token_cache"
+    cache = MagicMock()
+    cache.serialize.return_value = '{"AccessToken": {}}'
+
+    with patch.object(sharepoint_auth, "TOKEN_CACHE_FILE", str(cache_file)):
+        sharepoint_auth._save_token_cache(cache)
+
+    assert cache_file.read_text() == '{"AccessToken": {}}'
+    assert [p.name for p in tmp_path.iterdir()] == [".token_cache"]
+
+def test_contexts_share_graph_session():
+    """Test that every context reuses the process-wide connection pool"""
+    first = SharePointContext(access_token="a", token_expiry=datetime.now() + timedelta(hours=1))
+    second = SharePointContext(access_token="b", token_expiry=datetime.now() + timedelta(hours=1))
+
+    assert first.session is second.session
+
+def test_site_endpoint_built_from_parsed_url():
+    """Test the precomputed site endpoint matches the parsed domain and site name"""
+    from config import settings
+
+    assert settings.SHAREPOINT_SITE_ENDPOINT == (
+        f"/sites/{settings.SHAREPOINT_DOMAIN}:/sites/{settings.SHAREPOINT_SITE_NAME}"
+    )
+    assert (settings.SHAREPOINT_DOMAIN, settings.SHAREPOINT_SITE_NAME) == parse_site_url(
+        settings.SHAREPOINT_CONFIG["site_url"]
+    )
+
+@patch('requests.Session.delete')
+@patch('requests.Session.post')
+def test_write_permissions_resolves_ids_in_one_batch(mock_post, mock_delete):
+    """Test that missing site and drive IDs are looked up with a single $batch request"""
+    batch_response = MagicMock(status_code=200)
+    batch_response.content = json.dumps({"responses": [
+        {"id": "site", "status": 200, "body": {"id": "site-id"}},
+        {"id": "drives", "status": 200, "body": {"value": [{"id": "drive-id"}]}},
+    ]}).encode()
+    folder_response = MagicMock(status_code=201, content=b'{"id": "folder-id"}')
+    mock_post.side_effect = [batch_response, folder_response]
+    mock_delete.return_value = MagicMock(status_code=204)
+    
+    context = SharePointContext(
+        access_token="test_token",
+        token_expiry=datetime.now() + timedelta(hours=1)
+    )
+    
+    assert context.test_write_permissions() == True
+    assert mock_post.call_args_list[0].args[0].endswith("/$batch")
+    assert mock_post.call_args_list[1].args[0].endswith("/sites/site-id/drives/drive-id/root/children")
+    assert mock_delete.call_args.args[0].endswith("/drives/drive-id/items/folder-id")
+
+async def test_write_probe_runs_once_when_diagnostics_enabled():
+    """Test that the write-permission probe is opt-in and skipped on later authentications"""
+    app = MagicMock()
+    app.acquire_token_silent.return_value = {"access_token": "token", "expires_in": 3600}
+    
+    with patch.object(sharepoint_auth, "validate_config"), \
+         patch.object(sharepoint_auth, "_get_msal_app", return_value=app), \
+         patch.object(SharePointContext, "test_connection", return_value=True), \
+         patch.object(SharePointContext, "test_write_permissions", return_value=True) as mock_probe, \
+         patch.object(sharepoint_auth, "_DIAGNOSTICS_DONE", False), \
+         patch.object(sharepoint_auth, "_CONTEXT", None):
+        with patch.object(sharepoint_auth, "RUN_STARTUP_DIAGNOSTICS", False):
+            await sharepoint_auth.get_auth_context()
+        mock_probe.assert_not_called()
+        
+        sharepoint_auth._CONTEXT = None
+        with patch.object(sharepoint_auth, "RUN_STARTUP_DIAGNOSTICS", True):
+            await sharepoint_auth.get_auth_context()
+            await sharepoint_auth.get_auth_context()
+        mock_probe.assert_called_once()
+
+async def test_get_auth_context_reuses_process_context():
+    """Test that re-authenticating swaps the token into the existing context"""
+    app = MagicMock()
+    app.acquire_token_silent.side_effect = [
+        {"access_token": "first", "expires_in": 3600},
+        {"access_token": "second", "expires_in": 3600},
+    ]
+    
+    with patch.object(sharepoint_auth, "validate_config"), \
+         patch.object(sharepoint_auth, "_get_msal_app", return_value=app), \
+         patch.object(SharePointContext, "test_connection", return_value=True) as mock_probe, \
+         patch.object(sharepoint_auth, "RUN_STARTUP_DIAGNOSTICS", False), \
+         patch.object(sharepoint_auth, "_CONTEXT", None):
+        first = await sharepoint_auth.get_auth_context()
+        second = await sharepoint_auth.get_auth_context()
+    
+    assert second is first
+    assert first.access_token == "second"
+    mock_probe.assert_called_once()
+
+def test_token_cache_flushed_only_when_changed(tmp_path):
+    """Test that the exit-time flush writes the cache once, and only after MSAL changed it"""
+    cache_file = tmp_path / ".token_cache"
+    cache = MagicMock(has_state_changed=False)
+    cache.serialize.return_value = "{}"
+    
+    with patch.object(sharepoint_auth, "TOKEN_CACHE_FILE", str(cache_file)), \
+         patch.object(sharepoint_auth, "_TOKEN_CACHE", cache):
+        sharepoint_auth._flush_token_cache()
+        assert not cache_file.exists()
+        
+        cache.has_state_changed = True
+        sharepoint_auth._flush_token_cache()
+        sharepoint_auth._flush_token_cache()
+    
+    cache.serialize.assert_called_once()
+    assert cache_file.read_text() == "{}"
+
+@patch('auth.sharepoint_auth._load_token_cache')
+def test_token_cache_reloaded_when_file_changes(mock_load_cache, tmp_path):
+    """Test that the shared app re-reads the cache file only after another process rewrites it"""
+    cache_file = tmp_path / ".token_cache"
+    cache_file.write_text("{}")
+    
+    with patch.object(sharepoint_auth, "TOKEN_CACHE_FILE", str(cache_file)), \
+         patch.object(sharepoint_auth, "_APP", MagicMock()), \
+         patch.object(sharepoint_auth, "_TOKEN_CACHE_MTIME", None):
+        sharepoint_auth._TOKEN_CACHE_MTIME = sharepoint_auth._token_cache_mtime()
+        sharepoint_auth._get_msal_app()
+        mock_load_cache.assert_not_called()
+        
+        os.utime(cache_file, ns=(0, sharepoint_auth._TOKEN_CACHE_MTIME + 1_000_000))
+        sharepoint_auth._get_msal_app()
+        mock_load_cache.assert_called_once()
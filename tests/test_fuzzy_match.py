@@ -0,0 +1,33 @@
+from utils.fuzzy_match import find_best_match, fuzzy_score, is_fuzzy_match, make_matcher, prepare_pattern
+
+def test_fuzzy_score_requires_in_order_subsequence():
+    """Test that every pattern character must appear in order."""
+    assert fuzzy_score("recr2023", "Recruiting_2023.xlsx") > 0
+    assert fuzzy_score("2023recr", "Recruiting_2023.xlsx") == 0
+    assert fuzzy_score("", "Budget.xlsx") == 0
+
+def test_fuzzy_score_prefers_boundaries_and_runs():
+    """Test that contiguous matches at word starts outscore scattered ones."""
+    assert fuzzy_score("budget", "Budget 2023.xlsx") > fuzzy_score("budget", "bulk update gadgets.xlsx")
+    assert fuzzy_score("q3 deck", "Q3 Deck.pptx") > fuzzy_score("q3 deck", "Q3 quarterly decisions.pptx")
+
+def test_is_fuzzy_match_rejects_scattered_matches():
+    """Test the per-character threshold for counting a fuzzy hit."""
+    assert is_fuzzy_match("recr 2023", "Recruiting_2023.xlsx")
+    assert not is_fuzzy_match("budget", "Bob's quarterly update on gadgets.xlsx")
+
+def test_prepare_pattern_drops_stop_terms():
+    """Test that the caller's stop terms are left out of the key terms."""
+    pattern_clean, pattern_terms, pattern_words = prepare_pattern(' "Q3 Sales Data.xlsx" ', frozenset(("xlsx", "data")))
+    assert pattern_clean == "q3 sales data.xlsx"
+    assert pattern_terms == ["sales"]
+    assert pattern_words == ["q3", "sales", "data.xlsx"]
+
+def test_make_matcher_and_find_best_match():
+    """Test matching on key terms and picking the exact name over partial hits."""
+    pattern_clean, pattern_terms, pattern_words = prepare_pattern("budget 2023", frozenset())
+    matches = make_matcher(pattern_clean, pattern_terms)
+    assert matches("2023 Budget Review.xlsx")
+    assert not matches("Forecast.xlsx")
+    files = [{"filename": "Budget 2023 draft.xlsx"}, {"filename": "Budget 2023.xlsx"}]
+    assert find_best_match(files, pattern_clean, pattern_words)["filename"] == "Budget 2023.xlsx"
@@ -0,0 +1,55 @@
+import logging
+from datetime import datetime, timedelta
+from unittest.mock import patch, AsyncMock
+
+import pandas as pd
+
+from auth.sharepoint_auth import SharePointContext
+from general_excel_analyzer import _compact_dtypes, analyze_recruiting_metrics, find_excel_file
+from utils.graph_client import GraphClient
+
+def test_recruiting_metrics_skip_text_columns_named_like_metrics(capsys, caplog):
+    """Test that a categorical "Offer Status" column does not break the recruiting totals."""
+    df = _compact_dtypes(pd.DataFrame({
+        "Recruiter": ["Karrin", "Jenna"] * 4,
+        "Applications": [10, 20, 30, 40] * 2,
+        "Offers": [1, 0, 1, 1] * 2,
+        "Offer Status": ["Yes", "No"] * 4,
+    }))
+    assert df["Offer Status"].dtype == "category"
+    
+    caplog.set_level(logging.INFO, logger="excel_analyzer")
+    analyze_recruiting_metrics(df, 6)
+    
+    output = capsys.readouterr().out
+    assert "Recruiting metrics calculation | pandas aggregation methods | SUCCESS" in caplog.text
+    assert "FAILED" not in caplog.text
+    assert "Total Applications: 200" in output
+    assert "Total Offers: 6" in output
+
+@patch('general_excel_analyzer.save_json_cache')
+@patch('general_excel_analyzer.load_json_cache', return_value={})
+@patch('general_excel_analyzer._cache_file_search_result')
+@patch('general_excel_analyzer._get_graph_client')
+async def test_find_excel_file_walks_folders_when_search_misses(mock_get_client, mock_cache, mock_load_cache, mock_save_cache):
+    """Test that an abbreviated pattern still finds a file nested below the library root."""
+    graph_client = GraphClient(SharePointContext(access_token="test_token", token_expiry=datetime.now() + timedelta(hours=1)))
+    graph_client.get_site_info = AsyncMock(return_value={"id": "site"})
+    graph_client.list_document_libraries = AsyncMock(return_value={"value": [{"id": "drive", "name": "Documents"}]})
+    graph_client.search_drive = AsyncMock(return_value=[])
+    graph_client.batch = AsyncMock(side_effect=[
+        {"0": {"status": 200, "body": {"value": [
+            {"id": "folder", "name": "Hiring", "eTag": "v1", "folder": {"childCount": 2}},
+            {"id": "other", "name": "Budget.xlsx", "file": {"mimeType": "application/octet-stream"}},
+        ]}}},
+        {"0": {"status": 200, "body": {"value": [
+            {"id": "item", "name": "Recruiting_2023.xlsx", "file": {"mimeType": "application/octet-stream"}},
+        ]}}},
+    ])
+    mock_get_client.return_value = graph_client
+    
+    match = await find_excel_file("recr2023", context=None, refresh=True)
+    
+    assert match["item_id"] == "item"
+    assert graph_client.batch.await_count == 2
+    assert "/items/folder/children" in graph_client.batch.await_args.args[0][0]["url"]
@@ -1,9 +1,12 @@
+import io
 import pytest
 from unittest.mock import patch, MagicMock
 from datetime import datetime, timedelta
 
+import orjson
+
 from auth.sharepoint_auth import SharePointContext
-from utils.graph_client import GraphClient
+from utils.graph_client import GraphAPIError, GraphClient
 
 @pytest.fixture
 def mock_context():
@@ -18,13 +21,13 @@ def graph_client(mock_context):
     """Create a GraphClient instance with mock context."""
     return GraphClient(mock_context)
 
-@patch('requests.get')
+@patch('requests.Session.get')
 async def test_get(mock_get, graph_client):
     """Test the GET method of GraphClient."""
     # Setup mock response
     mock_response = MagicMock()
     mock_response.status_code = 200
-    mock_response.json.return_value = {"value": "test_data"}
+    mock_response.content = b'{"value": "test_data"}'
     mock_get.return_value = mock_response
     
     # Test successful request
@@ -40,17 +43,18 @@ async def test_get(mock_get, graph_client):
     mock_response.status_code = 404
     mock_response.text = "Not Found"
     
-    with pytest.raises(Exception) as excinfo:
+    with pytest.raises(GraphAPIError) as excinfo:
         await graph_client.get("endpoint/error")
     assert "Graph API error: 404" in str(excinfo.value)
+    assert excinfo.value.status_code == 404
 
-@patch('requests.post')
+@patch('requests.Session.post')
 async def test_post(mock_post, graph_client):
     """Test the POST method of GraphClient."""
     # Setup mock response
     mock_response = MagicMock()
     mock_response.status_code = 201
-    mock_response.json.return_value = {"id": "new_item_id"}
+    mock_response.content = b'{"id": "new_item_id"}'
     mock_post.return_value = mock_response
     
     # Test data
@@ -72,4 +76,118 @@ async def test_post(mock_post, graph_client):
     
     with pytest.raises(Exception) as excinfo:
         await graph_client.post("endpoint/error", test_data)
-    assert "Graph API error: 400" in str(excinfo.value)
\ No newline at end of file
+    assert "Graph API error: 400" in str(excinfo.value)
+
+@patch('requests.Session.get')
+async def test_search_drive_follows_next_link(mock_get, graph_client):
+    """Test that drive search collects every result page."""
+    first_page = MagicMock(status_code=200)
+    first_page.content = (
+        b'{"value": [{"id": "1"}], "@odata.nextLink": '
+        b'"https://graph.microsoft.com/v1.0/sites/s/drives/d/root/search(q=\'q\')?$skiptoken=abc"}'
+    )
+    second_page = MagicMock(status_code=200, content=b'{"value": [{"id": "2"}]}')
+    mock_get.side_effect = [first_page, second_page]
+    
+    items = await graph_client.search_drive("s", "d", "Bob's report", select=["id", "name"])
+    
+    assert [item["id"] for item in items] == ["1", "2"]
+    assert mock_get.call_args_list[0].args[0] == (
+        "https://graph.microsoft.com/v1.0/sites/s/drives/d/root/"
+        "search(q='Bob%27%27s%20report')?$top=200&$select=id,name"
+    )
+    assert mock_get.call_args_list[1].args[0].endswith("?$skiptoken=abc")
+
+@patch('requests.Session.post')
+async def test_batch_splits_into_chunks_of_twenty(mock_post, graph_client):
+    """Test that $batch sub-requests are sent 20 at a time and keyed by id."""
+    def batch_response(url, headers, json):
+        response = MagicMock(status_code=200)
+        response.content = orjson.dumps({"responses": [
+            {"id": request["id"], "status": 200, "body": {"value": []}} for request in json["requests"]
+        ]})
+        return response
+    mock_post.side_effect = batch_response
+    
+    requests = [{"id": str(i), "method": "GET", "url": f"/items/{i}/children"} for i in range(45)]
+    responses = await graph_client.batch(requests)
+    
+    assert sorted(responses, key=int) == [str(i) for i in range(45)]
+    assert sorted(len(c.kwargs["json"]["requests"]) for c in mock_post.call_args_list) == [5, 20, 20]
+    assert all(c.args[0] == "https://graph.microsoft.com/v1.0/$batch" for c in mock_post.call_args_list)
+
+@patch('requests.Session.get')
+async def test_download_document_streams_to_file(mock_get, graph_client):
+    """Test that downloads are streamed in chunks into a seekable file."""
+    mock_response = MagicMock(status_code=200)
+    mock_response.__enter__.return_value = mock_response
+    mock_response.iter_content.return_value = [b"PK", b"\x03\x04"]
+    mock_get.return_value = mock_response
+    
+    content = await graph_client.download_document("site", "drive", "item")
+    
+    assert content.read() == b"PK\x03\x04"
+    assert mock_get.call_args.kwargs["stream"] is True
+    assert "Content-Type" not in mock_get.call_args.kwargs["headers"]
+
+@patch('requests.Session.post')
+@patch('requests.Session.get')
+async def test_site_lookups_are_cached_until_a_list_is_created(mock_get, mock_post, graph_client):
+    """Test that site and drive lookups are reused, and dropped when a library is added."""
+    mock_get.return_value = MagicMock(status_code=200, content=b'{"id": "site"}')
+    mock_post.return_value = MagicMock(status_code=201, content=b'{"id": "list"}')
+    
+    with patch.dict('utils.graph_client._SITE_LOOKUP_CACHE', clear=True):
+        assert await graph_client.get_site_info("contoso.sharepoint.com", "team") == {"id": "site"}
+        await GraphClient(graph_client.context).get_site_info("contoso.sharepoint.com", "team")
+        await graph_client.list_document_libraries("contoso.sharepoint.com", "team")
+        assert mock_get.call_count == 2
+        
+        await graph_client.create_list("site", "Docs", template="documentLibrary")
+        await graph_client.list_document_libraries("contoso.sharepoint.com", "team")
+        assert mock_get.call_count == 3
+
+@patch('requests.Session.put')
+@patch('requests.Session.post')
+async def test_upload_large_file_sends_ordered_ranges(mock_post, mock_put, graph_client):
+    """Test that upload sessions send consecutive byte ranges without the bearer token."""
+    mock_post.return_value = MagicMock(status_code=200, content=b'{"uploadUrl": "https://upload.example/session"}')
+    mock_put.side_effect = [
+        MagicMock(status_code=202),
+        MagicMock(status_code=201, content=b'{"id": "item"}'),
+    ]
+    
+    with patch('utils.graph_client.UPLOAD_CHUNK_SIZE', 4):
+        result = await graph_client.upload_large_file("drives/d/items/f:/deck.pptx:", io.BytesIO(b"0123456"))
+    
+    assert result == {"id": "item"}
+    assert mock_post.call_args.args[0].endswith("drives/d/items/f:/deck.pptx:/createUploadSession")
+    assert [c.kwargs["headers"]["Content-Range"] for c in mock_put.call_args_list] == ["bytes 0-3/7", "bytes 4-6/7"]
+    assert [c.kwargs["data"] for c in mock_put.call_args_list] == [b"0123", b"456"]
+    assert all("Authorization" not in c.kwargs["headers"] for c in mock_put.call_args_list)
+
+@patch('requests.Session.put')
+@patch('requests.Session.post')
+async def test_upload_large_file_puts_empty_files_directly(mock_post, mock_put, graph_client):
+    """Test that an empty file skips the upload session, which rejects empty ranges."""
+    mock_put.return_value = MagicMock(status_code=201, content=b'{"id": "item"}')
+    
+    result = await graph_client.upload_large_file("drives/d/root:/empty.txt:", io.BytesIO())
+    
+    assert result == {"id": "item"}
+    mock_post.assert_not_called()
+    assert mock_put.call_args.args[0].endswith("drives/d/root:/empty.txt:/content")
+
+@patch('requests.Session.put')
+@patch('requests.Session.post')
+async def test_upload_document_uses_upload_session_from_4mb(mock_post, mock_put, graph_client):
+    """Test that documents of 4 MB or more go through an upload session."""
+    mock_post.return_value = MagicMock(status_code=200, content=b'{"uploadUrl": "https://upload.example/session"}')
+    mock_put.return_value = MagicMock(status_code=201, content=b'{"id": "item"}')
+    
+    with patch('utils.graph_client.UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024):
+        result = await graph_client.upload_document("s", "d", "Reports", "big.bin", b"\0" * (4 * 1024 * 1024))
+    
+    assert result == {"id": "item"}
+    assert mock_post.call_args.args[0].endswith("sites/s/drives/d/root:/Reports/big.bin:/createUploadSession")
+    assert mock_put.call_args.args[0] == "https://upload.example/session"
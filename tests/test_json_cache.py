@@ -0,0 +1,22 @@
+from utils.json_cache import atomic_write, load_json_cache, save_json_cache
+
+def test_json_cache_round_trip(tmp_path):
+    """Test that a saved cache loads back and leaves no temp files behind."""
+    path = str(tmp_path / ".cache")
+    save_json_cache(path, {"d:1": {"etag": "abc", "items": [{"id": "2"}]}})
+    assert load_json_cache(path) == {"d:1": {"etag": "abc", "items": [{"id": "2"}]}}
+    assert [p.name for p in tmp_path.iterdir()] == [".cache"]
+
+def test_json_cache_missing_or_corrupt_file_is_empty(tmp_path):
+    """Test that an unreadable cache is treated as empty."""
+    assert load_json_cache(str(tmp_path / "missing")) == {}
+    (tmp_path / "corrupt").write_text("{not json")
+    assert load_json_cache(str(tmp_path / "corrupt")) == {}
+
+def test_atomic_write_replaces_file(tmp_path):
+    """Test that text is written as UTF-8 over an existing file without leaving temp files."""
+    path = tmp_path / "token_cache"
+    path.write_bytes(b"old")
+    atomic_write(str(path), "caché")
+    assert path.read_bytes() == "caché".encode("utf-8")
+    assert [p.name for p in tmp_path.iterdir()] == ["token_cache"]
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch, AsyncMock
+
+from auth.sharepoint_auth import SharePointContext
+from powerpoint_analyzer import find_powerpoint_file
+from utils.graph_client import GraphClient
+
+@patch('powerpoint_analyzer._get_graph_client')
+async def test_find_powerpoint_file_walks_folders_when_search_misses(mock_get_client):
+    """Test that an abbreviated pattern still finds a deck by walking the library folders."""
+    graph_client = GraphClient(SharePointContext(access_token="test_token", token_expiry=datetime.now() + timedelta(hours=1)))
+    graph_client.get_site_info = AsyncMock(return_value={"id": "site"})
+    graph_client.list_document_libraries = AsyncMock(return_value={"value": [{"id": "drive", "name": "Documents"}]})
+    graph_client.search_drive = AsyncMock(return_value=[])
+    graph_client.batch = AsyncMock(return_value={"0": {"status": 200, "body": {"value": [
+        {"id": "item", "name": "Q3 Deck.pptx", "file": {"mimeType": "application/octet-stream"}},
+    ]}}})
+    mock_get_client.return_value = graph_client
+    
+    match = await find_powerpoint_file("q3deck", context=None)
+    
+    assert match["item_id"] == "item"
+    graph_client.batch.assert_awaited_once()
+
+@patch('powerpoint_analyzer.save_json_cache')
+@patch('powerpoint_analyzer.load_json_cache')
+@patch('powerpoint_analyzer._get_graph_client')
+async def test_find_powerpoint_file_reuses_cached_folder_listing(mock_get_client, mock_load_cache, mock_save_cache):
+    """Test that a folder whose eTag is unchanged is served from the listing cache."""
+    graph_client = GraphClient(SharePointContext(access_token="test_token", token_expiry=datetime.now() + timedelta(hours=1)))
+    graph_client.get_site_info = AsyncMock(return_value={"id": "site"})
+    graph_client.list_document_libraries = AsyncMock(return_value={"value": [{"id": "drive", "name": "Documents"}]})
+    graph_client.search_drive = AsyncMock(return_value=[])
+    graph_client.batch = AsyncMock(return_value={"0": {"status": 200, "body": {"value": [
+        {"id": "folder", "name": "Decks", "eTag": "v1", "folder": {"childCount": 1}},
+    ]}}})
+    mock_get_client.return_value = graph_client
+    mock_load_cache.return_value = {"drive:folder": {"etag": "v1", "items": [
+        {"id": "item", "name": "Q3 Deck.pptx", "file": {"mimeType": "application/octet-stream"}},
+    ]}}
+    
+    match = await find_powerpoint_file("q3deck", context=None)
+    
+    assert match["item_id"] == "item"
+    # Only the root is listed; the unchanged folder's children come from the cache
+    graph_client.batch.assert_awaited_once()
+    mock_save_cache.assert_not_called()
@@ -0,0 +1,54 @@
+"""Token helpers shared by the diagnostic scripts"""
+
+import os
+import base64
+
+import msal
+import orjson
+
+from config.settings import TOKEN_CACHE_FILE
+from utils.json_cache import atomic_write
+
+AUTHORITY_HOST = "https://login.microsoftonline.com"
+GRAPH_SCOPE = ["https://graph.microsoft.com/.default"]
+
+def acquire_app_token(tenant_id, client_id, client_secret):
+    """Acquire an app-only Graph token, reusing tokens persisted by earlier runs
+
+    Returns a tuple of the MSAL result and whether it came from the token cache.
+    """
+    cache = msal.SerializableTokenCache()
+    if os.path.exists(TOKEN_CACHE_FILE):
+        with open(TOKEN_CACHE_FILE, 'r') as cache_file:
+            cache.deserialize(cache_file.read())
+
+    app = msal.ConfidentialClientApplication(
+        client_id,
+        authority=f"{AUTHORITY_HOST}/{tenant_id}",
+        client_credential=client_secret,
+        token_cache=cache
+    )
+
+    # Try the token cache first, then the client credential flow
+    result = app.acquire_token_silent(GRAPH_SCOPE, account=None)
+    from_cache = bool(result)
+    if not result:
+        result = app.acquire_token_for_client(scopes=GRAPH_SCOPE)
+
+    # Persist the cache only when a new token was acquired
+    if cache.has_state_changed:
+        # Swap in a fully written file so a concurrent reader never sees a torn cache
+        atomic_write(TOKEN_CACHE_FILE, cache.serialize())
+
+    return result, from_cache
+
+def decode_jwt(token):
+    """Decode the payload of a JWT token, or return None if it is malformed"""
+    # Get token parts (header.payload.signature)
+    parts = token.split('.')
+    if len(parts) != 3:
+        return None
+
+    # Decode payload part (second part), adding padding
+    payload = parts[1].encode()
+    return orjson.loads(base64.urlsafe_b64decode(payload + b"=" * (-len(payload) % 4)))
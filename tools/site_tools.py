@@ -4,17 +4,22 @@ import json
 import logging
 from typing import Dict, Any, List, Optional
 
+import orjson
 from mcp.server.fastmcp import FastMCP, Context
 
 from auth.sharepoint_auth import refresh_token_if_needed
 from utils.graph_client import GraphClient
 from utils.document_processor import DocumentProcessor
 from utils.content_generator import ContentGenerator
-from config.settings import SHAREPOINT_CONFIG
+from config.settings import SHAREPOINT_CONFIG, SHAREPOINT_DOMAIN, SHAREPOINT_SITE_NAME
 
 # Set up logging
 logger = logging.getLogger("sharepoint_tools")
 
+def _to_json(data: Any) -> str:
+    """Serialize a tool result as indented JSON."""
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+
 def register_site_tools(mcp: FastMCP):
     """Register SharePoint site tools with the MCP server."""
     
@@ -33,10 +38,9 @@ def register_site_tools(mcp: FastMCP):
             # Create Graph client
             graph_client = GraphClient(sp_ctx)
             
-            # Extract site domain and name from site URL
-            site_parts = SHAREPOINT_CONFIG["site_url"].replace("https://", "").split("/")
-            domain = site_parts[0]
-            site_name = site_parts[2] if len(site_parts) > 2 else "root"
+            # Site domain and name are parsed once from the site URL in settings
+            domain = SHAREPOINT_DOMAIN
+            site_name = SHAREPOINT_SITE_NAME
             
             logger.info(f"Getting info for site: {site_name} in domain: {domain}")
             
@@ -54,7 +58,7 @@ def register_site_tools(mcp: FastMCP):
             }
             
             logger.info(f"Successfully retrieved site info for: {result['name']}")
-            return json.dumps(result, indent=2)
+            return _to_json(result)
             
         except Exception as e:
             logger.error(f"Error in get_site_info: {str(e)}")
@@ -75,10 +79,9 @@ def register_site_tools(mcp: FastMCP):
             # Create Graph client
             graph_client = GraphClient(sp_ctx)
             
-            # Extract site domain and name from site URL
-            site_parts = SHAREPOINT_CONFIG["site_url"].replace("https://", "").split("/")
-            domain = site_parts[0]
-            site_name = site_parts[2] if len(site_parts) > 2 else "root"
+            # Site domain and name are parsed once from the site URL in settings
+            domain = SHAREPOINT_DOMAIN
+            site_name = SHAREPOINT_SITE_NAME
             
             logger.info(f"Listing document libraries for site: {site_name} in domain: {domain}")
             
@@ -96,7 +99,7 @@ def register_site_tools(mcp: FastMCP):
                 } for drive in drives]
             
             logger.info(f"Successfully retrieved {len(formatted_drives)} document libraries")
-            return json.dumps(formatted_drives, indent=2)
+            return _to_json(formatted_drives)
             
         except Exception as e:
             logger.error(f"Error in list_document_libraries: {str(e)}")
@@ -121,16 +124,14 @@ def register_site_tools(mcp: FastMCP):
             # Create Graph client
             graph_client = GraphClient(sp_ctx)
             
-            # Extract site domain and name from site URL
-            site_parts = SHAREPOINT_CONFIG["site_url"].replace("https://", "").split("/")
-            domain = site_parts[0]
-            site_name = site_parts[2] if len(site_parts) > 2 else "root"
+            # Site name is parsed once from the site URL in settings
+            site_name = SHAREPOINT_SITE_NAME
             
             logger.info(f"Searching for '{query}' in site: {site_name}")
             
-            # First get site info to get site ID
-            site_info = await graph_client.get_site_info(domain, site_name)
-            site_id = site_info.get("id")
+            # Use the site ID cached on the context (resolved on first use)
+            await sp_ctx.ensure_site_ids()
+            site_id = sp_ctx.site_id
             
             if not site_id:
                 logger.error("Failed to get site ID")
@@ -168,7 +169,7 @@ def register_site_tools(mcp: FastMCP):
                     })
             
             logger.info(f"Search returned {len(formatted_results)} results")
-            return json.dumps(formatted_results, indent=2)
+            return _to_json(formatted_results)
             
         except Exception as e:
             logger.error(f"Error in search_sharepoint: {str(e)}")
@@ -197,7 +198,7 @@ def register_site_tools(mcp: FastMCP):
             site_info = await graph_client.create_site(display_name, alias, description)
             
             logger.info(f"Successfully created site: {display_name}")
-            return json.dumps(site_info, indent=2)
+            return _to_json(site_info)
         except Exception as e:
             logger.error(f"Error in create_sharepoint_site: {str(e)}")
             return f"Error creating SharePoint site: {str(e)}"
@@ -225,7 +226,7 @@ def register_site_tools(mcp: FastMCP):
             list_info = await graph_client.create_intelligent_list(site_id, purpose, display_name)
             
             logger.info(f"Successfully created intelligent list: {display_name}")
-            return json.dumps(list_info, indent=2)
+            return _to_json(list_info)
         except Exception as e:
             logger.error(f"Error in create_intelligent_list: {str(e)}")
             return f"Error creating intelligent list: {str(e)}"
@@ -256,7 +257,7 @@ def register_site_tools(mcp: FastMCP):
             item_info = await graph_client.create_list_item(site_id, list_id, fields)
             
             logger.info(f"Successfully created list item in list: {list_id}")
-            return json.dumps(item_info, indent=2)
+            return _to_json(item_info)
         except Exception as e:
             logger.error(f"Error in create_list_item: {str(e)}")
             return f"Error creating list item: {str(e)}"
@@ -289,7 +290,7 @@ def register_site_tools(mcp: FastMCP):
             item_info = await graph_client.update_list_item(site_id, list_id, item_id, fields)
             
             logger.info(f"Successfully updated list item {item_id} in list: {list_id}")
-            return json.dumps(item_info, indent=2)
+            return _to_json(item_info)
         except Exception as e:
             logger.error(f"Error in update_list_item: {str(e)}")
             return f"Error updating list item: {str(e)}"
@@ -318,7 +319,7 @@ def register_site_tools(mcp: FastMCP):
             library_info = await graph_client.create_advanced_document_library(site_id, display_name, doc_type)
             
             logger.info(f"Successfully created advanced document library: {display_name}")
-            return json.dumps(library_info, indent=2)
+            return _to_json(library_info)
         except Exception as e:
             logger.error(f"Error in create_advanced_document_library: {str(e)}")
             return f"Error creating advanced document library: {str(e)}"
@@ -356,7 +357,7 @@ def register_site_tools(mcp: FastMCP):
             )
             
             logger.info(f"Successfully uploaded document: {file_name}")
-            return json.dumps(doc_info, indent=2)
+            return _to_json(doc_info)
         except Exception as e:
             logger.error(f"Error in upload_document: {str(e)}")
             return f"Error uploading document: {str(e)}"
@@ -413,7 +414,7 @@ def register_site_tools(mcp: FastMCP):
             }
             
             logger.info(f"Successfully created and published modern page: {name}")
-            return json.dumps(result, indent=2)
+            return _to_json(result)
         except Exception as e:
             logger.error(f"Error in create_modern_page: {str(e)}")
             return f"Error creating modern page: {str(e)}"
@@ -448,7 +449,7 @@ def register_site_tools(mcp: FastMCP):
             )
             
             logger.info(f"Successfully created news post: {title}")
-            return json.dumps(news_info, indent=2)
+            return _to_json(news_info)
         except Exception as e:
             logger.error(f"Error in create_news_post: {str(e)}")
             return f"Error creating news post: {str(e)}"
@@ -499,7 +500,7 @@ def register_site_tools(mcp: FastMCP):
                 formatted_items.append(formatted_item)
             
             logger.info(f"Successfully listed {len(formatted_items)} items in folder {folder_id}")
-            return json.dumps(formatted_items, indent=2)
+            return _to_json(formatted_items)
         except Exception as e:
             logger.error(f"Error in list_document_contents: {str(e)}")
             return f"Error listing document contents: {str(e)}"
@@ -532,7 +533,7 @@ def register_site_tools(mcp: FastMCP):
             processed_content = DocumentProcessor.process_document(content, filename)
             
             logger.info(f"Successfully processed document content for: {filename}")
-            return json.dumps(processed_content, indent=2)
+            return _to_json(processed_content)
         except Exception as e:
             logger.error(f"Error in get_document_content: {str(e)}")
             return f"Error getting document content: {str(e)}"
@@ -594,7 +595,7 @@ import asyncio
 # Add project root to path
 sys.path.append(r"{project_root}")
 
-from general_excel_analyzer import analyze_excel_file
+from general_excel_analyzer import analyze_excel_file, setup_step_logging
 
 async def main():
     try:
@@ -605,6 +606,8 @@ async def main():
         return None
 
 if __name__ == "__main__":
+    # The step log goes to stdout, which is parsed below
+    setup_step_logging()
     asyncio.run(main())
 '''
             
@@ -674,19 +677,19 @@ if __name__ == "__main__":
                         analysis_results["structured_metrics"] = metrics
                     
                     logger.info("Excel analysis completed successfully")
-                    return json.dumps(analysis_results, indent=2)
+                    return _to_json(analysis_results)
                     
                 else:
                     error_text = stderr.decode('utf-8')
                     logger.error(f"Excel analyzer script failed: {error_text}")
                     
-                    return json.dumps({
+                    return _to_json({
                         "error": f"Excel analysis failed: {error_text}",
                         "prompt": prompt,
                         "filename_pattern": filename_pattern,
                         "analysis_type": analysis_type,
                         "status": "failed"
-                    }, indent=2)
+                    })
                     
             except Exception as e:
                 # Clean up temporary script
@@ -698,10 +701,10 @@ if __name__ == "__main__":
                 
         except Exception as e:
             logger.error(f"Error in analyze_excel_with_prompt: {str(e)}")
-            return json.dumps({
+            return _to_json({
                 "error": f"Error analyzing Excel file: {str(e)}",
                 "prompt": prompt
-            }, indent=2)
+            })
     
     @mcp.tool()
     async def analyze_powerpoint_with_prompt(ctx: Context, prompt: str) -> str:
@@ -771,7 +774,7 @@ import asyncio
 # Add project root to path
 sys.path.append(r"{project_root}")
 
-from powerpoint_analyzer import analyze_powerpoint_file
+from powerpoint_analyzer import analyze_powerpoint_file, setup_step_logging
 
 async def main():
     try:
@@ -782,6 +785,8 @@ async def main():
         return None
 
 if __name__ == "__main__":
+    # The step log goes to stdout, which is parsed below
+    setup_step_logging()
     asyncio.run(main())
 '''
             
@@ -858,18 +863,18 @@ if __name__ == "__main__":
                         analysis_results["structured_metrics"] = metrics
                     
                     logger.info("PowerPoint analysis completed successfully")
-                    return json.dumps(analysis_results, indent=2)
+                    return _to_json(analysis_results)
                     
                 else:
                     error_text = stderr.decode('utf-8')
                     logger.error(f"PowerPoint analyzer script failed: {error_text}")
                     
-                    return json.dumps({
+                    return _to_json({
                         "error": f"PowerPoint analysis failed: {error_text}",
                         "prompt": prompt,
                         "filename_pattern": filename_pattern,
                         "status": "failed"
-                    }, indent=2)
+                    })
                     
             except Exception as e:
                 # Clean up temporary script
@@ -881,10 +886,10 @@ if __name__ == "__main__":
                 
         except Exception as e:
             logger.error(f"Error in analyze_powerpoint_with_prompt: {str(e)}")
-            return json.dumps({
+            return _to_json({
                 "error": f"Error analyzing PowerPoint file: {str(e)}",
                 "prompt": prompt
-            }, indent=2)
+            })
 
     @mcp.tool()
     async def generate_powerpoint_report_with_prompt(ctx: Context, prompt: str) -> str:
@@ -921,7 +926,7 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import the PowerPoint generator
-from powerpoint_report_generator import create_recruiting_presentation, upload_to_sharepoint
+from powerpoint_report_generator import get_recruiting_presentation, upload_to_sharepoint
 
 def main():
     """Generate PowerPoint presentation and upload to SharePoint"""
@@ -941,22 +946,22 @@ def main():
         function_calls = []
         
         # Step 1: Generate presentation
-        print("[{{}}] Step 1: create_recruiting_presentation()".format(datetime.now().strftime("%H:%M:%S")))
+        print("[{{}}] Step 1: get_recruiting_presentation()".format(datetime.now().strftime("%H:%M:%S")))
         print("File: powerpoint_report_generator.py")
         print("Status: IN_PROGRESS")
         print("----" * 15)
         
         function_calls.append({{
             "step": 1,
-            "function": "create_recruiting_presentation",
+            "function": "get_recruiting_presentation",
             "file": "powerpoint_report_generator.py",
             "status": "in_progress",
             "timestamp": datetime.now().isoformat()
         }})
         
-        prs = create_recruiting_presentation()
+        prs = get_recruiting_presentation()
         
-        print("[{{}}] Step 1: create_recruiting_presentation()".format(datetime.now().strftime("%H:%M:%S")))
+        print("[{{}}] Step 1: get_recruiting_presentation()".format(datetime.now().strftime("%H:%M:%S")))
         print("File: powerpoint_report_generator.py")
         print("Status: SUCCESS")
         print("----" * 15)
@@ -1,5 +1,5 @@
 """Utility modules for SharePoint MCP server."""
 
-from .graph_client import GraphClient
+from .graph_client import GraphAPIError, GraphClient
 
-__all__ = ["GraphClient"]
\ No newline at end of file
+__all__ = ["GraphAPIError", "GraphClient"]
\ No newline at end of file
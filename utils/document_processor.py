@@ -14,6 +14,14 @@ try:
 except ImportError:
     HAS_DOCUMENT_LIBRARIES = False
 
+# Prefer the native calamine Excel reader when python-calamine is installed (pandas >= 2.2);
+# otherwise None lets pandas pick the engine by file type (openpyxl for .xlsx, xlrd for .xls)
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    EXCEL_ENGINE = None
+
 # Setup logging
 logger = logging.getLogger("document_processor")
 
@@ -95,7 +103,7 @@ class DocumentProcessor:
         Returns:
             Processed data and analysis
         """
-        df_dict = pd.read_excel(io.BytesIO(content), sheet_name=None)
+        df_dict = pd.read_excel(io.BytesIO(content), sheet_name=None, engine=EXCEL_ENGINE)
         sheets = {}
         
         for sheet_name, df in df_dict.items():
@@ -0,0 +1,165 @@
+"""Fuzzy file name matching for the SharePoint file finders."""
+
+import re
+from typing import Callable, Dict, FrozenSet, List, Tuple
+
+# Scoring weights, in the spirit of fzf: every matched character scores, matches at word
+# boundaries and runs of consecutive matches earn bonuses, gaps between matches cost points
+SCORE_MATCH = 16
+BONUS_BOUNDARY = 8
+BONUS_CONSECUTIVE = 4
+PENALTY_GAP_START = 3
+PENALTY_GAP_EXTENSION = 1
+
+# Minimum average score per pattern character for a fuzzy match to count as a search hit
+MIN_SCORE_PER_CHAR = 14
+
+# Characters after which a match counts as the start of a word
+BOUNDARY_CHARS = frozenset(" /._-")
+
+# Pattern terms are words of 3+ characters
+_TERM_RE = re.compile(r'\b\w{3,}\b')
+
+
+def _char_positions(text: str) -> Dict[str, int]:
+    """Map each character to a bitmask of the positions where it occurs."""
+    bitmap: Dict[str, int] = {}
+    for i, ch in enumerate(text):
+        bitmap[ch] = bitmap.get(ch, 0) | (1 << i)
+    return bitmap
+
+
+def fuzzy_score(pattern: str, candidate: str) -> int:
+    """Score how well pattern matches candidate as an in-order subsequence.
+
+    Matching is case-insensitive and whitespace in the pattern is ignored, so
+    "recr 2023" matches "Recruiting_2023.xlsx". The next occurrence of each pattern
+    character is found with a single mask operation on the candidate's position
+    bitmap rather than a character-by-character scan.
+
+    Args:
+        pattern: Search pattern
+        candidate: File name to score
+
+    Returns:
+        A positive score if every pattern character appears in order, otherwise 0
+    """
+    candidate = candidate.lower()
+    bitmap = _char_positions(candidate)
+
+    score = 0
+    matched = False
+    pos = -1
+    for ch in pattern.lower():
+        if ch.isspace():
+            continue
+
+        # Occurrences of ch after the previous match; the lowest set bit is the next one
+        mask = bitmap.get(ch, 0) >> (pos + 1) << (pos + 1)
+        if not mask:
+            return 0
+        next_pos = (mask & -mask).bit_length() - 1
+
+        score += SCORE_MATCH
+        if next_pos == 0 or candidate[next_pos - 1] in BOUNDARY_CHARS:
+            score += BONUS_BOUNDARY
+        if matched:
+            gap = next_pos - pos - 1
+            if gap == 0:
+                score += BONUS_CONSECUTIVE
+            else:
+                score -= PENALTY_GAP_START + PENALTY_GAP_EXTENSION * (gap - 1)
+
+        matched = True
+        pos = next_pos
+
+    return max(score, 1) if matched else 0
+
+
+def is_fuzzy_match(pattern: str, candidate: str) -> bool:
+    """Return True when candidate matches pattern closely enough to be a search hit."""
+    length = sum(not ch.isspace() for ch in pattern)
+    return length > 0 and fuzzy_score(pattern, candidate) >= MIN_SCORE_PER_CHAR * length
+
+
+def prepare_pattern(pattern: str, stop_terms: FrozenSet[str]) -> Tuple[str, List[str], List[str]]:
+    """Normalize a search pattern once: cleaned text, key terms and words.
+
+    Key terms are the words of 3+ characters, minus stop_terms: generic words such as
+    "file" or the file type that say nothing about which file is meant.
+    """
+    # Remove quotes and extra spaces from pattern
+    pattern_clean = pattern.lower().strip().strip("'\"").strip()
+    pattern_terms = [term for term in _TERM_RE.findall(pattern_clean) if term not in stop_terms]
+    return pattern_clean, pattern_terms, pattern_clean.split()
+
+
+def is_exact_name(filename_lower: str, pattern_clean: str) -> bool:
+    """Check if the pattern is the whole file name, with or without its extension."""
+    return pattern_clean == filename_lower or pattern_clean == filename_lower.rsplit(".", 1)[0]
+
+
+def make_matcher(pattern_clean: str, pattern_terms: List[str]) -> Callable[[str], bool]:
+    """Build a file name predicate for a pattern prepared by prepare_pattern.
+
+    Everything that depends only on the pattern is worked out here once, not per file.
+    """
+    # Repeated terms count once; at least 40% of the distinct terms must be present
+    terms = tuple(dict.fromkeys(pattern_terms))
+    needed = -(-2 * len(terms) // 5)
+
+    def matches(filename):
+        filename_lower = filename.lower()
+
+        # Check for exact substring match first
+        if pattern_clean in filename_lower:
+            return True
+
+        # Then check if most key terms are present, in any order, stopping once enough are found
+        found = 0
+        for term in terms:
+            if term in filename_lower:
+                found += 1
+                if found >= needed:
+                    return True
+
+        # Finally an in-order fuzzy match (e.g. "recr2023")
+        return is_fuzzy_match(pattern_clean, filename_lower)
+
+    return matches
+
+
+def find_best_match(files: List[Dict], pattern_clean: str, pattern_words: List[str]) -> Dict:
+    """Find the best matching file from a list of file infos with "filename" keys."""
+    if len(files) == 1:
+        return files[0]
+
+    names = [file_info["filename"].lower() for file_info in files]
+
+    # Fast paths before scoring: an exact name (with or without extension), then a unique substring hit
+    for file_info, filename_lower in zip(files, names):
+        if is_exact_name(filename_lower, pattern_clean):
+            return file_info
+    substring_hits = [i for i, filename_lower in enumerate(names) if pattern_clean in filename_lower]
+    if len(substring_hits) == 1:
+        return files[substring_hits[0]]
+
+    def score(i):
+        filename_lower = names[i]
+
+        # Fuzzy match quality (boundary hits, consecutive runs, small gaps)
+        score = fuzzy_score(pattern_clean, filename_lower)
+
+        # Word matches; a substring hit contains every word, so they only rank the other files
+        if not substring_hits:
+            score += 10 * sum(word in filename_lower for word in pattern_words)
+
+        # Prefer more recent files (if timestamp available)
+        if files[i].get("last_modified"):
+            score += 1
+        return score
+
+    # Substring hits always outscore other files, so only they need scoring; the first of
+    # equal scores wins
+    candidates = substring_hits or range(len(files))
+    return files[max(candidates, key=score)]
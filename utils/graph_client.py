@@ -1,16 +1,53 @@
 """Microsoft Graph API client for SharePoint MCP server."""
 
-import requests
+import asyncio
+import io
 import logging
 import json
 import base64
-from typing import Dict, Any, Optional, List, Union, BinaryIO
+import tempfile
+import time
+from urllib.parse import quote
+from typing import Dict, Any, Optional, List, Tuple, Union, BinaryIO, AsyncIterator
+
+import orjson
 
 from auth.sharepoint_auth import SharePointContext
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+# Set up logging (handlers and levels are configured by the application)
 logger = logging.getLogger("graph_client")
+logger.addHandler(logging.NullHandler())
+
+# Maximum number of sub-requests Graph accepts in a single $batch call
+GRAPH_BATCH_LIMIT = 20
+
+# Downloads are streamed in chunks of this size, and spill from memory to a temp file past the limit
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_SPOOL_LIMIT = 32 * 1024 * 1024
+
+# Upload sessions take byte ranges in multiples of 320 KiB; Graph recommends 5-10 MiB per range
+UPLOAD_CHUNK_SIZE = 10 * 320 * 1024
+
+# Properties a drive walk reads, and the largest page Graph returns for children listings
+WALK_CHILDREN_QUERY = "?$select=id,name,eTag,cTag,file,folder,size,lastModifiedDateTime&$top=999"
+
+# Site and document library lookups are reused for this many seconds, across clients
+SITE_LOOKUP_CACHE_TTL = 300
+
+# (base URL, endpoint) -> (monotonic expiry, response)
+_SITE_LOOKUP_CACHE: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
+
+def _listing_version(folder: Dict[str, Any]) -> Optional[str]:
+    """Version tag of a folder's children: its cTag where Graph returns one, else its eTag."""
+    return folder.get("cTag") or folder.get("eTag")
+
+class GraphAPIError(Exception):
+    """Error response from the Graph API, carrying its HTTP status code."""
+    
+    def __init__(self, status_code: int, error_text: str):
+        super().__init__(f"Graph API error: {status_code} - {error_text}")
+        self.status_code = status_code
+        self.error_text = error_text
 
 class GraphClient:
     """Client for interacting with Microsoft Graph API."""
@@ -23,6 +60,7 @@ class GraphClient:
         """
         self.context = context
         self.base_url = context.graph_url
+        self.session = context.session
         logger.debug(f"GraphClient initialized with base URL: {self.base_url}")
     
     async def get(self, endpoint: str) -> Dict[str, Any]:
@@ -35,7 +73,7 @@ class GraphClient:
             Response from the API as dictionary
             
         Raises:
-            Exception: If the request fails
+            GraphAPIError: If the request fails
         """
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
         logger.debug(f"Making GET request to: {url}")
@@ -44,7 +82,7 @@ class GraphClient:
         headers = self.context.headers
         
         # Send request
-        response = requests.get(url, headers=headers)
+        response = await asyncio.to_thread(self.session.get, url, headers=headers)
         
         # Log response
         logger.debug(f"Response status code: {response.status_code}")
@@ -60,10 +98,10 @@ class GraphClient:
                     logger.error("Token does not have required claims (scp or roles)")
                     logger.error("Please check application permissions in Azure AD")
             
-            raise Exception(f"Graph API error: {response.status_code} - {error_text}")
+            raise GraphAPIError(response.status_code, error_text)
         
         # Return successful response as JSON
-        return response.json()
+        return orjson.loads(response.content)
     
     async def post(self, endpoint: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Send POST request to Graph API.
@@ -76,7 +114,7 @@ class GraphClient:
             Response from the API as dictionary
             
         Raises:
-            Exception: If the request fails
+            GraphAPIError: If the request fails
         """
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
         logger.debug(f"Making POST request to: {url}")
@@ -86,7 +124,7 @@ class GraphClient:
         headers = self.context.headers
         
         # Send request
-        response = requests.post(url, headers=headers, json=data)
+        response = await asyncio.to_thread(self.session.post, url, headers=headers, json=data)
         
         # Log response
         logger.debug(f"Response status code: {response.status_code}")
@@ -102,10 +140,10 @@ class GraphClient:
                     logger.error("Token does not have required claims (scp or roles)")
                     logger.error("Please check application permissions in Azure AD")
             
-            raise Exception(f"Graph API error: {response.status_code} - {error_text}")
+            raise GraphAPIError(response.status_code, error_text)
         
         # Return successful response as JSON
-        return response.json()
+        return orjson.loads(response.content)
     
     async def patch(self, endpoint: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Send PATCH request to Graph API.
@@ -118,7 +156,7 @@ class GraphClient:
             Response from the API as dictionary
             
         Raises:
-            Exception: If the request fails
+            GraphAPIError: If the request fails
         """
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
         logger.debug(f"Making PATCH request to: {url}")
@@ -128,7 +166,7 @@ class GraphClient:
         headers = self.context.headers
         
         # Send request
-        response = requests.patch(url, headers=headers, json=data)
+        response = await asyncio.to_thread(self.session.patch, url, headers=headers, json=data)
         
         # Log response
         logger.debug(f"Response status code: {response.status_code}")
@@ -136,12 +174,12 @@ class GraphClient:
         if response.status_code not in (200, 201, 204):
             error_text = response.text
             logger.error(f"Graph API error: {response.status_code} - {error_text}")
-            raise Exception(f"Graph API error: {response.status_code} - {error_text}")
+            raise GraphAPIError(response.status_code, error_text)
         
         # Return successful response as JSON if available
         if response.status_code == 204:
             return {"status": "success"}
-        return response.json()
+        return orjson.loads(response.content)
     
     async def delete(self, endpoint: str) -> Dict[str, Any]:
         """Send DELETE request to Graph API.
@@ -153,7 +191,7 @@ class GraphClient:
             Status information
             
         Raises:
-            Exception: If the request fails
+            GraphAPIError: If the request fails
         """
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
         logger.debug(f"Making DELETE request to: {url}")
@@ -162,7 +200,7 @@ class GraphClient:
         headers = self.context.headers
         
         # Send request
-        response = requests.delete(url, headers=headers)
+        response = await asyncio.to_thread(self.session.delete, url, headers=headers)
         
         # Log response
         logger.debug(f"Response status code: {response.status_code}")
@@ -170,7 +208,7 @@ class GraphClient:
         if response.status_code not in (200, 201, 204):
             error_text = response.text
             logger.error(f"Graph API error: {response.status_code} - {error_text}")
-            raise Exception(f"Graph API error: {response.status_code} - {error_text}")
+            raise GraphAPIError(response.status_code, error_text)
         
         # Return successful status
         return {"status": "success"}
@@ -187,7 +225,7 @@ class GraphClient:
             Response from the API as dictionary
             
         Raises:
-            Exception: If the request fails
+            GraphAPIError: If the request fails
         """
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
         logger.debug(f"Uploading file to: {url}")
@@ -200,7 +238,7 @@ class GraphClient:
             headers['Content-Type'] = content_type
         
         # Send request
-        response = requests.put(url, headers=headers, data=file_content)
+        response = await asyncio.to_thread(self.session.put, url, headers=headers, data=file_content)
         
         # Log response
         logger.debug(f"Response status code: {response.status_code}")
@@ -208,13 +246,89 @@ class GraphClient:
         if response.status_code not in (200, 201, 204):
             error_text = response.text
             logger.error(f"Graph API error: {response.status_code} - {error_text}")
-            raise Exception(f"Graph API error: {response.status_code} - {error_text}")
+            raise GraphAPIError(response.status_code, error_text)
         
         # Return successful response as JSON if available
         if response.status_code == 204:
             return {"status": "success"}
-        return response.json()
+        return orjson.loads(response.content)
+    
+    async def upload_large_file(self, item_path: str, file_content: BinaryIO) -> Dict[str, Any]:
+        """Upload a file of any size through a resumable upload session.
+        
+        The whole file, from its start, is sent in UPLOAD_CHUNK_SIZE byte ranges. Graph
+        requires the ranges in order, so they are sent one at a time; each range is
+        retried on transient failures by the session.
+        
+        Args:
+            item_path: Drive item path up to the file name, e.g. "drives/{id}/items/{folder}:/a.pptx:"
+            file_content: Seekable file object with the content
+            
+        Returns:
+            The uploaded drive item
+            
+        Raises:
+            GraphAPIError: If the session cannot be created or a range is rejected
+        """
+        item_path = item_path.rstrip('/')
+        if not file_content.seek(0, 2):
+            # Upload sessions reject empty byte ranges, so an empty file is created with a plain PUT
+            return await self.upload_file(f"{item_path}/content", b"")
+        
+        session = await self.post(
+            f"{item_path}/createUploadSession",
+            {"item": {"@microsoft.graph.conflictBehavior": "replace"}},
+        )
+        logger.debug(f"Created upload session for: {item_path}")
+        return await asyncio.to_thread(self._upload_in_chunks, session["uploadUrl"], file_content)
+    
+    def _upload_in_chunks(self, upload_url: str, file_content: BinaryIO) -> Dict[str, Any]:
+        """Blocking half of upload_large_file, run in a worker thread."""
+        total = file_content.seek(0, 2)
+        file_content.seek(0)
+        
+        start = 0
+        while True:
+            chunk = file_content.read(UPLOAD_CHUNK_SIZE)
+            end = start + len(chunk) - 1
+            # The upload URL is pre-authenticated; sending the bearer token to it is rejected
+            headers = {
+                "Content-Length": str(len(chunk)),
+                "Content-Range": f"bytes {start}-{end}/{total}",
+            }
+            response = self.session.put(upload_url, headers=headers, data=chunk)
+            logger.debug(f"Uploaded bytes {start}-{end}/{total}: {response.status_code}")
+            
+            if response.status_code in (200, 201):
+                return orjson.loads(response.content)
+            if response.status_code != 202 or end + 1 >= total:
+                error_text = response.text
+                logger.error(f"Graph API error: {response.status_code} - {error_text}")
+                raise GraphAPIError(response.status_code, error_text)
+            start = end + 1
         
+    async def batch(self, requests: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Send sub-requests through the JSON $batch endpoint.
+        
+        Requests are split into chunks of GRAPH_BATCH_LIMIT, which are sent concurrently.
+        
+        Args:
+            requests: Sub-requests, each with a unique "id", a "method" and a relative "url"
+            
+        Returns:
+            Sub-responses (with "status" and "body") keyed by request id
+            
+        Raises:
+            GraphAPIError: If a batch request itself fails
+        """
+        chunks = [requests[i:i + GRAPH_BATCH_LIMIT] for i in range(0, len(requests), GRAPH_BATCH_LIMIT)]
+        results = await asyncio.gather(*(self.post("$batch", {"requests": chunk}) for chunk in chunks))
+        return {
+            response["id"]: response
+            for result in results
+            for response in result.get("responses", [])
+        }
+    
     async def get_site_info(self, domain: str, site_name: str) -> Dict[str, Any]:
         """Get SharePoint site information.
         
@@ -227,7 +341,7 @@ class GraphClient:
         """
         endpoint = f"sites/{domain}:/sites/{site_name}"
         logger.info(f"Getting site info for domain: {domain}, site: {site_name}")
-        return await self.get(endpoint)
+        return await self._get_site_lookup(endpoint)
     
     async def list_document_libraries(self, domain: str, site_name: str) -> Dict[str, Any]:
         """List all document libraries in the site.
@@ -241,7 +355,18 @@ class GraphClient:
         """
         endpoint = f"sites/{domain}:/sites/{site_name}:/drives"
         logger.info(f"Listing document libraries for domain: {domain}, site: {site_name}")
-        return await self.get(endpoint)
+        return await self._get_site_lookup(endpoint)
+    
+    async def _get_site_lookup(self, endpoint: str) -> Dict[str, Any]:
+        """GET a site-level lookup, reusing a response cached within SITE_LOOKUP_CACHE_TTL."""
+        key = (self.base_url, endpoint)
+        cached = _SITE_LOOKUP_CACHE.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
+        result = await self.get(endpoint)
+        _SITE_LOOKUP_CACHE[key] = (time.monotonic() + SITE_LOOKUP_CACHE_TTL, result)
+        return result
     
     async def create_site(self, display_name: str, alias: str, description: str = "") -> Dict[str, Any]:
         """Create a new SharePoint site.
@@ -285,7 +410,10 @@ class GraphClient:
             "description": description
         }
         logger.info(f"Creating new list with name: {display_name} in site: {site_id}")
-        return await self.post(endpoint, data)
+        result = await self.post(endpoint, data)
+        # A new document library changes the site's drives
+        _SITE_LOOKUP_CACHE.clear()
+        return result
     
     async def create_list_item(self, site_id: str, list_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new item in a SharePoint list.
@@ -585,6 +713,113 @@ class GraphClient:
         logger.info(f"Listing contents of folder {folder_id} in drive {drive_id}")
         return await self.get(endpoint)
     
+    async def search_drive(self, site_id: str, drive_id: str, query: str,
+                           select: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Search a document library server-side, including all of its subfolders.
+        
+        Args:
+            site_id: ID of the site
+            drive_id: ID of the document library
+            query: Search text matched against file names, metadata and content
+            select: Optional list of driveItem properties to return
+        
+        Returns:
+            Matching items from every result page
+        """
+        # Single quotes are escaped by doubling them inside OData string literals
+        q = quote(query.replace("'", "''"), safe="")
+        endpoint = f"sites/{site_id}/drives/{drive_id}/root/search(q='{q}')?$top=200"
+        if select:
+            endpoint += f"&$select={','.join(select)}"
+        logger.info(f"Searching drive {drive_id} for '{query}'")
+        
+        items = []
+        while endpoint:
+            page = await self.get(endpoint)
+            items.extend(page.get("value", []))
+            # nextLink is absolute; strip the base URL so get() can rebuild it
+            next_link = page.get("@odata.nextLink")
+            endpoint = next_link[len(self.base_url):] if next_link else None
+        return items
+    
+    async def list_folders_children(self, site_id: str, drive_id: str, folders: List[Dict[str, Any]],
+                                    listing_cache: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """List the children of several folders with $batch requests, following paged listings.
+        
+        A folder's cTag/eTag, as seen in its parent's listing, changes when its children do, so
+        a folder whose tag still matches its entry in listing_cache reuses the cached children
+        without a request. Single-page listings are stored back in the cache.
+        
+        Args:
+            site_id: ID of the site
+            drive_id: ID of the document library
+            folders: Folder items (with "id" and "name") to list
+            listing_cache: Optional dict of cached listings, updated in place
+        
+        Returns:
+            The children of all the folders
+        """
+        items = []
+        pending = []
+        for folder in folders:
+            url = f"/sites/{site_id}/drives/{drive_id}/items/{folder['id']}/children{WALK_CHILDREN_QUERY}"
+            version = _listing_version(folder)
+            cache_key = f"{drive_id}:{folder['id']}" if version and listing_cache is not None else None
+            cached = listing_cache.get(cache_key) if cache_key else None
+            if cached and cached["etag"] == version:
+                items.extend(cached["items"])
+            else:
+                pending.append((folder, url, cache_key))
+        
+        while pending:
+            responses = await self.batch([
+                {"id": str(i), "method": "GET", "url": url}
+                for i, (_, url, _) in enumerate(pending)
+            ])
+            
+            next_pages = []
+            for i, (folder, _, cache_key) in enumerate(pending):
+                response = responses.get(str(i), {})
+                if response.get("status") == 200:
+                    body = response.get("body", {})
+                    children = body.get("value", [])
+                    items.extend(children)
+                    # nextLink is absolute; $batch wants the URL relative to the API version
+                    next_link = body.get("@odata.nextLink")
+                    if next_link:
+                        next_pages.append((folder, next_link[len(self.base_url):], None))
+                    if cache_key:
+                        # Only complete (single-page) listings can be replayed later
+                        if next_link:
+                            listing_cache.pop(cache_key, None)
+                        else:
+                            listing_cache[cache_key] = {"etag": _listing_version(folder), "items": children}
+                else:
+                    logger.warning(f"Could not list folder {folder['name']}: HTTP {response.get('status')}")
+            pending = next_pages
+        return items
+    
+    async def walk_drive(self, site_id: str, drive_id: str,
+                         listing_cache: Optional[Dict[str, Any]] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Walk a document library's folder tree breadth-first from the root.
+        
+        Each level's folders are listed together through list_folders_children, so a walk
+        takes one round of $batch requests per level rather than one request per folder.
+        
+        Args:
+            site_id: ID of the site
+            drive_id: ID of the document library
+            listing_cache: Optional dict of cached listings, see list_folders_children
+        
+        Yields:
+            The items of each level of the tree, starting with the root's children
+        """
+        folders = [{"id": "root", "name": "root"}]
+        while folders:
+            items = await self.list_folders_children(site_id, drive_id, folders, listing_cache)
+            yield items
+            folders = [item for item in items if item.get("folder")]
+    
     async def search_sharepoint(self, site_id: str, query: str) -> Dict[str, Any]:
         """Search for content in SharePoint.
         
@@ -635,15 +870,52 @@ class GraphClient:
         headers.pop("Content-Type", None)
         
         logger.info(f"Getting document content for item {item_id}")
-        response = requests.get(url, headers=headers, stream=True)
+        # Read the whole body in the worker thread so the event loop never waits on the download
+        response = await asyncio.to_thread(self.session.get, url, headers=headers)
         
         if response.status_code != 200:
             error_text = response.text
             logger.error(f"Graph API error: {response.status_code} - {error_text}")
-            raise Exception(f"Graph API error: {response.status_code} - {error_text}")
+            raise GraphAPIError(response.status_code, error_text)
         
         return response.content
     
+    async def download_document(self, site_id: str, drive_id: str, item_id: str) -> BinaryIO:
+        """Stream a document into a seekable file object.
+        
+        Small documents stay in memory; larger ones spill to a temporary file, so the
+        body is never buffered twice.
+        
+        Args:
+            site_id: ID of the site
+            drive_id: ID of the document library
+            item_id: ID of the document
+        
+        Returns:
+            File object positioned at the start of the content
+        """
+        url = f"{self.base_url}/sites/{site_id}/drives/{drive_id}/items/{item_id}/content"
+        headers = self.context.headers.copy()
+        # Remove Content-Type header to respect response Content-Type
+        headers.pop("Content-Type", None)
+        
+        logger.info(f"Downloading document content for item {item_id}")
+        return await asyncio.to_thread(self._download_to_file, url, headers)
+    
+    def _download_to_file(self, url: str, headers: Dict[str, str]) -> BinaryIO:
+        """Blocking half of download_document, run in a worker thread."""
+        with self.session.get(url, headers=headers, stream=True) as response:
+            if response.status_code != 200:
+                error_text = response.text
+                logger.error(f"Graph API error: {response.status_code} - {error_text}")
+                raise GraphAPIError(response.status_code, error_text)
+            
+            buffer = tempfile.SpooledTemporaryFile(max_size=DOWNLOAD_SPOOL_LIMIT)
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                buffer.write(chunk)
+        buffer.seek(0)
+        return buffer
+    
     async def upload_document(self, site_id: str, drive_id: str, folder_path: str, 
                           file_name: str, file_content: bytes, 
                           content_type: str = None) -> Dict[str, Any]:
@@ -660,25 +932,20 @@ class GraphClient:
         Returns:
             Created document information
         """
-        # Prepare the endpoint
+        # Prepare the item path
         if folder_path and folder_path != '/':
             # Upload to a subfolder
-            endpoint = f"sites/{site_id}/drives/{drive_id}/root:/{folder_path}/{file_name}:/content"
+            item_path = f"sites/{site_id}/drives/{drive_id}/root:/{folder_path}/{file_name}:"
         else:
             # Upload to root folder
-            endpoint = f"sites/{site_id}/drives/{drive_id}/root:/{file_name}:/content"
+            item_path = f"sites/{site_id}/drives/{drive_id}/root:/{file_name}:"
         
         logger.info(f"Uploading document {file_name} to {folder_path if folder_path else 'root'}")
         
-        # For small files, use simple upload
+        # For small files, use simple upload; the simple PUT is capped at 4 MB
         if len(file_content) < 4 * 1024 * 1024:  # 4 MB
-            return await self.upload_file(endpoint, file_content, content_type)
-        else:
-            # For larger files, we need to use upload session (not implemented for simplicity)
-            # This would involve creating an upload session and uploading the file in chunks
-            logger.warning("Large file upload (>4MB) should use upload session.")
-            logger.warning("Implementing simple upload instead, which might fail for large files.")
-            return await self.upload_file(endpoint, file_content, content_type)
+            return await self.upload_file(f"{item_path}/content", file_content, content_type)
+        return await self.upload_large_file(item_path, io.BytesIO(file_content))
     
     async def create_folder_in_library(self, site_id: str, drive_id: str, 
                                     folder_path: str) -> Dict[str, Any]:
@@ -886,6 +1153,8 @@ class GraphClient:
         
         logger.info(f"Creating advanced document library for {doc_type} documents")
         library_info = await self.post(endpoint, data)
+        # The new library changes the site's drives
+        _SITE_LOOKUP_CACHE.clear()
         list_id = library_info.get("id")
         drive_id = None
         
@@ -0,0 +1,51 @@
+"""Small JSON files that keep Graph lookups between analyzer runs."""
+
+import os
+import tempfile
+from typing import Any, Dict, Union
+
+import orjson
+
+
+def load_json_cache(path: str) -> Dict[str, Any]:
+    """Load a JSON cache file, or return an empty cache if it is missing or unreadable."""
+    try:
+        with open(path, 'rb') as cache_file:
+            data = orjson.loads(cache_file.read())
+    except (OSError, orjson.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def atomic_write(path: str, data: Union[str, bytes]) -> None:
+    """Write a file by swapping in a fully written temp file, so a concurrent run never reads a torn file.
+
+    The temp file is created next to path, so concurrent writers never collide and os.replace
+    stays on one file system. str data is written as UTF-8.
+
+    Raises:
+        OSError: If the file cannot be written
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    fd, tmp_file = tempfile.mkstemp(
+        prefix=f"{os.path.basename(path)}.",
+        suffix=".tmp",
+        dir=os.path.dirname(os.path.abspath(path)),
+    )
+    try:
+        with os.fdopen(fd, 'wb') as out_file:
+            out_file.write(data)
+        os.replace(tmp_file, path)
+    except BaseException:
+        os.unlink(tmp_file)
+        raise
+
+
+def save_json_cache(path: str, data: Dict[str, Any]) -> None:
+    """Write a JSON cache file atomically, so a concurrent run never reads a torn file.
+
+    Raises:
+        OSError: If the file cannot be written
+    """
+    atomic_write(path, orjson.dumps(data))